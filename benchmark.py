@@ -0,0 +1,148 @@
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from swahili import (
+    DataManager, FoodRequest, IntentMatcher, JournalStorage, OrderIdAllocator, OrderService, OrderStore,
+    DELIVERY_STATUSES, MENU_ITEMS, REQUESTS_FILE, write_json_array
+)
+
+# ======================
+# SAMPLE DATA
+# ======================
+def sample_order(i: int, dishes: List[str]) -> Dict:
+    created = datetime(2026, 1 + i % 12, 1 + i % 28, i % 24, i % 60)
+    step = i % len(DELIVERY_STATUSES)
+    return {
+        "user_name": f"Mteja {i % 5000}",
+        "food_type": dishes[i % len(dishes)],
+        "quantity": 1 + i % 3,
+        "special_requests": "",
+        "timestamp": created.strftime("%Y-%m-%d %H:%M:%S"),
+        "completed": i % 4 == 0,
+        "delivery_status": DELIVERY_STATUSES[step],
+        "order_id": f"ORD-{10000 + i}",
+        "price": MENU_ITEMS[dishes[i % len(dishes)]]["price"] * (1 + i % 3),
+        "version": step,
+        # Ten minutes per stage up to the current status, as update_status records it
+        "status_history": [[DELIVERY_STATUSES[s], int(created.timestamp()) + 600 * s] for s in range(1, step + 1)]
+    }
+
+def iter_sample_orders(count: int) -> Iterator[Dict]:
+    dishes = list(MENU_ITEMS)
+    return (sample_order(i, dishes) for i in range(count))
+
+def sample_orders(count: int) -> List[Dict]:
+    return list(iter_sample_orders(count))
+
+def fresh_service(count: int) -> OrderService:
+    # A store preloaded with count orders, in its own directory
+    os.chdir(tempfile.mkdtemp(prefix="food-bench-"))
+    with open(REQUESTS_FILE, "w") as f:
+        write_json_array(f, iter_sample_orders(count))
+    DataManager.engine = JournalStorage()
+    OrderIdAllocator._shared = None
+    return OrderService(OrderStore())
+
+def latencies(operation, repeat: int) -> List[float]:
+    results = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        operation(i)
+        results.append(time.perf_counter() - start)
+    return results
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def report(name: str, values: List[float]):
+    print(f"  {name:<22} p50 {percentile(values, 50) * 1e3:8.3f} ms   "
+          f"p99 {percentile(values, 99) * 1e3:8.3f} ms   max {max(values) * 1e3:8.3f} ms")
+
+def measure_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+# ======================
+# BENCHMARKS
+# ======================
+def bench_memory(count: int):
+    # Decode from JSON each time so every row owns its strings, as after a real load
+    payload = json.dumps(sample_orders(count))
+    dict_bytes = measure_bytes(lambda: json.loads(payload))
+    slotted_bytes = measure_bytes(lambda: [FoodRequest.from_dict(r) for r in json.loads(payload)])
+    print(f"memory @ {count:,} orders")
+    print(f"  dict per order:        {dict_bytes / count:8.1f} bytes")
+    print(f"  FoodRequest per order: {slotted_bytes / count:8.1f} bytes")
+
+def bench_intent(count: int):
+    matcher = IntentMatcher()
+    questions = [
+        "habari erick",
+        "naomba menu yenu",
+        "viungo vya chai maziwa na supu ni nini?",
+        "where is my order ORD-10042",
+        "unaweza kupendekeza chakula? shauri tafadhali",
+        "delivery itachukua muda gani kufika nyumbani kwangu mbezi beach",
+        "asante sana kwa msaada wako",
+        "swali lisilo na neno lolote linalojulikana kabisa hapa",
+    ]
+    start = time.perf_counter()
+    for i in range(count):
+        matcher.match(questions[i % len(questions)])
+    elapsed = time.perf_counter() - start
+    print(f"intent match @ {count:,} questions")
+    print(f"  {count / elapsed:,.0f} matches/s, {elapsed / count * 1e6:.2f} us/match")
+
+def bench_service(sizes: List[int], operations: int):
+    dishes = list(MENU_ITEMS)
+    for count in sizes:
+        start = time.perf_counter()
+        service = fresh_service(count)
+        load_time = time.perf_counter() - start
+        print(f"OrderService @ {count:,} orders (load {load_time:.2f} s)")
+
+        placed = latencies(lambda i: service.place_order(f"Mteja {i}", dishes[i % len(dishes)], 1 + i % 3), operations)
+        print(f"  {'place_order':<22} {operations / sum(placed):,.0f} orders/s")
+        report("place_order", placed)
+
+        order_ids = [r.order_id for r in service.list_page(0, operations)]
+        report("update_status (save)", latencies(
+            lambda i: service.update_status(order_ids[i % len(order_ids)], DELIVERY_STATUSES[i % 3]), operations))
+        report("stats", latencies(lambda i: service.stats(), operations))
+        report("compact (full save)", latencies(lambda i: DataManager.get_engine().compact(), 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order storage benchmarks")
+    parser.add_argument("benchmark", choices=["memory", "intent", "service"])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated history sizes for the service benchmark")
+    parser.add_argument("--operations", type=int, default=1000,
+                        help="operations timed per size in the service benchmark")
+    args = parser.parse_args()
+    # Benchmarks write their own files; keep them out of the app's data directory
+    os.chdir(tempfile.mkdtemp(prefix="food-bench-"))
+    if args.benchmark == "memory":
+        bench_memory(args.orders)
+    elif args.benchmark == "intent":
+        bench_intent(args.orders)
+    elif args.benchmark == "service":
+        bench_service([int(n) for n in args.sizes.split(",")], args.operations)
+
+if __name__ == "__main__":
+    main()
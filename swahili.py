@@ -1,18 +1,68 @@
 import flet as ft
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable, Iterable, Iterator
 import asyncio
+import csv
+import heapq
+import contextlib
+from collections import Counter, deque
+import itertools
+import re
+import sqlite3
+import tempfile
+import threading
+import functools
+import http.server
+import logging
+import gzip
+from array import array
+import uuid
+
+logger = logging.getLogger(__name__)
 
 # ======================
 # CONSTANTS & CONFIGURATION
 # ======================
 REQUESTS_FILE = "food_requests.json"
+JOURNAL_FILE = "food_requests.journal"
+SQLITE_FILE = "food_requests.db"
+ANALYTICS_FILE = "sales_summary.json"
+ANALYTICS_SAVE_SECONDS = 30
+REPORT_FILE = "sales_report.csv"
+REPORT_DAYS = 30
+ARCHIVE_DIR = "archive"
+UPLOAD_DIR = "uploads"  # admin import files land here from the browser before they are read
+ARCHIVE_AFTER_DAYS = int(os.environ.get("FOOD_ARCHIVE_AFTER_DAYS", "30"))  # completed orders older than this are archived
+ARCHIVE_INTERVAL_SECONDS = 6 * 3600
+METRICS_WINDOW = 1024  # latency samples kept per metric
+METRICS_PORT = int(os.environ.get("FOOD_METRICS_PORT", "0"))  # serve metrics JSON on 127.0.0.1 when set
+METRICS_LOG_SECONDS = float(os.environ.get("FOOD_METRICS_LOG_SECONDS", "0"))  # log metrics periodically when set
+MENU_FILE = os.environ.get("FOOD_MENU_FILE", "menu.json")  # optional; MENU_ITEMS is used without it
+ORDER_SEQUENCE_FILE = "order_sequence.json"
+ORDER_ID_BLOCK = 100
+STORAGE_BACKEND = os.environ.get("FOOD_STORAGE_BACKEND", "journal")  # "journal" or "sqlite"
+ORDER_ID_PATTERN = re.compile(r"ord-\d+", re.IGNORECASE)
 DELIVERY_STATUSES = ["Preparing", "Cooking", "On the way", "Delivered"]
 ADMIN_PASSWORD = "admin123"
+ADMIN_PAGE_SIZE = 20
+MAX_RENDERED_MESSAGES = 50
+MAX_ARCHIVED_MESSAGES = 500
+MAX_NAME_WORDS = 4
+KITCHEN_STATIONS = 2
+KITCHEN_BATCH_SIZE = 8
+KITCHEN_TICK_SECONDS = 5
+DEFAULT_PREP_MINUTES = 15
+DELIVERY_MINUTES = 20
+UPDATE_FRAME_SECONDS = 0.02  # page updates requested within one frame go out together
+SUBMIT_FLASH_SECONDS = 0.4
+CONFETTI_PARTICLES = 40
+REDUCED_MOTION = os.environ.get("FOOD_REDUCED_MOTION") == "1"  # no confetti, for slow links and motion-sensitive staff
+CO_ORDER_MINUTES = 120  # orders by one customer this close together count as ordered together
+DAY_PERIODS = ((5, "asubuhi"), (11, "mchana"), (16, "jioni"), (21, "usiku"))  # (start hour, name)
 
 COLORS = {
     "primary": "#6C63FF",
@@ -35,132 +85,2190 @@ MENU_ITEMS = {
         "price": 2000,
         "description": "Wali na maharage",
         "ingredients": ["mchele", "maharage", "mchuzi"],
-        "icon": "RICE_BOWL"
+        "icon": "RICE_BOWL",
+        "prep_minutes": 20
     },
     "Mihogo": {
         "price": 500,
         "description": "Mihogo ya kupika",
         "ingredients": ["mihogo", "maji", "chumvi"],
-        "icon": "RESTAURANT"
+        "icon": "RESTAURANT",
+        "prep_minutes": 15
     },
     "Chapati Maharage": {
         "price": 1500,
         "description": "Chapati na maharage",
         "ingredients": ["unga", "maharage", "mafuta"],
-        "icon": "BREAD_SLICE"
+        "icon": "BREAD_SLICE",
+        "prep_minutes": 15
     },
     "Chai Maziwa": {
         "price": 500,
         "description": "Chai yenye maziwa",
         "ingredients": ["maji", "chai", "sukari", "maziwa"],
-        "icon": "COFFEE"
+        "icon": "COFFEE",
+        "prep_minutes": 5
     },
     "Ugali Dagaa": {
         "price": 1500,
         "description": "Ugali na dagaa",
         "ingredients": ["unga wa mahindi", "dagaa", "mchuzi"],
-        "icon": "KITCHEN"
+        "icon": "KITCHEN",
+        "prep_minutes": 20
     },
     "Supu": {
         "price": 1000,
         "description": "Supu ya nyama au mboga",
         "ingredients": ["maji", "nyama/mboga", "viungo"],
-        "icon": "SOUP_KITCHEN"
+        "icon": "SOUP_KITCHEN",
+        "prep_minutes": 25
     }
 }
 
-# ======================
-# DATA MODELS
-# ======================
-class FoodRequest:
-    def __init__(self, user_name: str, food_type: str, quantity: int = 1, special_requests: str = "", timestamp: Optional[str] = None):
-        self.user_name = user_name
-        self.food_type = food_type
-        self.quantity = quantity
-        self.special_requests = special_requests
-        self.timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.completed = False
-        self.delivery_status = "Preparing"
-        self.order_id = f"ORD-{random.randint(1000, 9999)}"
-        self.price = MENU_ITEMS.get(self.food_type, {}).get("price", 0) * self.quantity
+# ======================
+# DATA MODELS
+# ======================
+class Interner:
+    # Maps a small vocabulary of strings (menu items, statuses) to small ints so
+    # each order stores a shared int instead of its own string reference.
+    def __init__(self, values: List[str]):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+FOOD_TYPES = Interner(list(MENU_ITEMS))
+STATUSES = Interner(DELIVERY_STATUSES)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class FoodRequest:
+    # Slotted, with food_type/delivery_status held as Interner codes and the
+    # timestamp as epoch seconds; the string forms are exposed as properties.
+    __slots__ = ("user_name", "_food_code", "quantity", "special_requests", "created_at",
+                 "completed", "_status_code", "order_id", "price", "version", "_history")
+
+    def __init__(self, user_name: str, food_type: str, quantity: int = 1, special_requests: str = "", timestamp: Optional[str] = None,
+                 order_id: Optional[str] = None):
+        self.user_name = user_name
+        self.food_type = food_type
+        self.quantity = quantity
+        self.special_requests = special_requests
+        if timestamp:
+            self.timestamp = timestamp
+        else:
+            self.created_at = int(time.time())
+        self.completed = False
+        self._status_code = 0
+        self.order_id = order_id or OrderIdAllocator.shared().next_id()
+        self.price = MenuCatalog.current().price_of(food_type) * self.quantity
+        self.version = 0
+        # Status code and epoch, flattened, for every status change after
+        # creation; None until the first
+        self._history: Optional[array] = None
+
+    @property
+    def food_type(self) -> str:
+        return FOOD_TYPES.values[self._food_code]
+
+    @food_type.setter
+    def food_type(self, value: str):
+        self._food_code = FOOD_TYPES.code(value)
+
+    @property
+    def delivery_status(self) -> str:
+        return STATUSES.values[self._status_code]
+
+    @delivery_status.setter
+    def delivery_status(self, value: str):
+        self._status_code = STATUSES.code(value)
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created_at).strftime(TIMESTAMP_FORMAT)
+
+    @timestamp.setter
+    def timestamp(self, value: str):
+        self.created_at = int(datetime.fromisoformat(value).timestamp())
+
+    @property
+    def status_history(self) -> List[list]:
+        # The [status, epoch] pairs as saved; status_changes() avoids the copy
+        return [[status, changed_at] for status, changed_at in self.status_changes()]
+
+    @status_history.setter
+    def status_history(self, entries: Optional[List[list]]):
+        flat = array("q")
+        for status, changed_at in entries or []:
+            flat.append(STATUSES.code(status))
+            flat.append(int(changed_at))
+        self._history = flat or None
+
+    @property
+    def has_status_history(self) -> bool:
+        return self._history is not None
+
+    def status_changes(self) -> Iterator[tuple]:
+        history = self._history or ()
+        for i in range(0, len(history), 2):
+            yield STATUSES.values[history[i]], history[i + 1]
+
+    def record_status(self, when: Optional[float] = None):
+        if self._history is None:
+            self._history = array("q")
+        self._history.append(self._status_code)
+        self._history.append(int(when if when is not None else time.time()))
+
+    def status_entered_at(self) -> int:
+        return self._history[-1] if self._history else self.created_at
+
+    def to_dict(self) -> Dict:
+        return {
+            "user_name": self.user_name,
+            "food_type": self.food_type,
+            "quantity": self.quantity,
+            "special_requests": self.special_requests,
+            "timestamp": self.timestamp,
+            "completed": self.completed,
+            "delivery_status": self.delivery_status,
+            "order_id": self.order_id,
+            "price": self.price,
+            "version": self.version,
+            "status_history": self.status_history
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FoodRequest':
+        request = cls(
+            data["user_name"],
+            data["food_type"],
+            data.get("quantity", 1),
+            data.get("special_requests", ""),
+            timestamp=data["timestamp"],
+            order_id=data.get("order_id")
+        )
+        request.completed = data["completed"]
+        request.delivery_status = data.get("delivery_status", "Preparing")
+        request.price = data.get("price", 0)
+        request.version = data.get("version", 0)
+        request.status_history = data.get("status_history")
+        return request
+
+# ======================
+# CORE FUNCTIONALITY
+# ======================
+class StaleOrderError(Exception):
+    pass
+
+
+class OrderValidationError(ValueError):
+    pass
+
+
+class MenuCatalog:
+    # The menu plus everything derived from it, built once per menu version and
+    # never changed afterwards. Reloading builds a new catalog and swaps it in, so
+    # a reader holding the old one stays consistent and caches key on .version.
+    _current: Optional['MenuCatalog'] = None
+    _lock = threading.Lock()
+    _file_mtime: Optional[float] = None
+
+    def __init__(self, items: Dict[str, Dict], version: int = 0):
+        self.items = items
+        self.version = version
+        self.dishes = list(items)
+        self.prices = {dish: details["price"] for dish, details in items.items()}
+        self.price_texts = {dish: f"TZS {price:,}" for dish, price in self.prices.items()}
+        # (key, text) pairs rather than Options: Flet controls belong to one page
+        self.option_specs = [(dish, f"{dish} ({self.price_texts[dish]})") for dish in self.dishes]
+        self.icons = {dish: details.get("icon", "RESTAURANT") for dish, details in items.items()}
+        self.prep_seconds = {dish: details.get("prep_minutes", DEFAULT_PREP_MINUTES) * 60
+                             for dish, details in items.items()}
+        self.max_prep_seconds = max(self.prep_seconds.values(), default=DEFAULT_PREP_MINUTES * 60)
+        # Most popular first; a "popularity" score in the menu overrides the price
+        self.ranked = sorted(self.dishes, key=lambda dish: -items[dish].get("popularity", items[dish]["price"]))
+
+    def price_of(self, dish: str) -> int:
+        return self.prices.get(dish, 0)
+
+    def icon_for(self, dish: str) -> str:
+        return self.icons.get(dish, "RESTAURANT")
+
+    @staticmethod
+    def validate(items) -> Dict[str, Dict]:
+        if not isinstance(items, dict) or not items:
+            raise ValueError("menu must be a non-empty object of dishes")
+        for dish, details in items.items():
+            if not isinstance(details, dict) or not isinstance(details.get("price"), int) or details["price"] < 0:
+                raise ValueError(f"{dish}: price must be a whole number of shillings")
+            if not isinstance(details.get("description"), str) or not isinstance(details.get("ingredients"), list):
+                raise ValueError(f"{dish}: description and ingredients are required")
+        return items
+
+    @classmethod
+    def current(cls) -> 'MenuCatalog':
+        if cls._current is None:
+            with cls._lock:
+                if cls._current is None:
+                    cls._current = cls(MENU_ITEMS)
+            cls.reload()
+        return cls._current
+
+    @classmethod
+    def install(cls, items: Dict[str, Dict]) -> 'MenuCatalog':
+        # The one supported way to change the menu at runtime
+        items = cls.validate(items)
+        with cls._lock:
+            for dish in items:
+                FOOD_TYPES.code(dish)
+            version = cls._current.version + 1 if cls._current else 0
+            cls._current = cls(items, version)
+            return cls._current
+
+    @classmethod
+    def reload(cls, path: str = MENU_FILE) -> bool:
+        # Cheap enough to call on every navigation: only a changed file is read.
+        # A missing or broken file keeps the menu that is already in use.
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        if mtime == cls._file_mtime:
+            return False
+        cls._file_mtime = mtime
+        try:
+            with open(path, encoding="utf-8") as f:
+                cls.install(json.load(f))
+        except (OSError, ValueError):
+            return False
+        return True
+
+
+class Metrics:
+    # Latency samples per named hot path: a call count, the total time and the
+    # last `window` samples, which the percentiles come from, so they describe
+    # recent behaviour rather than the whole uptime.
+    _shared: Optional['Metrics'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._counts: Counter = Counter()
+        self._totals: Counter = Counter()
+        self._gauges: Dict[str, Callable] = {}
+        self._started = False
+
+    @classmethod
+    def shared(cls) -> 'Metrics':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def gauge(self, name: str, read: Callable):
+        # read() is called for every snapshot
+        self._gauges[name] = read
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+
+        def percentile(ordered: List[float], pct: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1e3, 3)
+
+        timings = {
+            name: {
+                "count": counts[name],
+                "mean_ms": round(totals[name] / counts[name] * 1e3, 3),
+                "p50_ms": percentile(ordered, 50),
+                "p95_ms": percentile(ordered, 95),
+                "p99_ms": percentile(ordered, 99),
+                "max_ms": round(ordered[-1] * 1e3, 3)
+            }
+            for name, ordered in sorted(samples.items())
+        }
+        return {"timings": timings, **{name: read() for name, read in self._gauges.items()}}
+
+    def format(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"{name:<28} n={t['count']:<8} p50={t['p50_ms']}ms p95={t['p95_ms']}ms p99={t['p99_ms']}ms max={t['max_ms']}ms"
+                 for name, t in snapshot.pop("timings").items()]
+        lines += [f"{name}: {value}" for name, value in snapshot.items()]
+        return "\n".join(lines)
+
+    def start(self, port: int = METRICS_PORT, log_seconds: float = METRICS_LOG_SECONDS):
+        # Both outputs are off unless configured, and start only once per process
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if port:
+            self.serve(port)
+        if log_seconds:
+            logging.basicConfig(level=logging.INFO)
+            threading.Thread(target=self._log_loop, args=(log_seconds,), name="metrics-log", daemon=True).start()
+
+    def serve(self, port: int):
+        # GET on any path returns the snapshot as JSON; bound to localhost only
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(metrics.snapshot(), indent=2).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def _log_loop(self, interval: float):
+        while True:
+            time.sleep(interval)
+            logger.info("metrics\n%s", self.format())
+
+
+def timed(name: str):
+    # Records every call of the wrapped function under `name` in Metrics.shared()
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Metrics.shared().timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def prep_seconds(food_type: str) -> int:
+    return MenuCatalog.current().prep_seconds.get(food_type, DEFAULT_PREP_MINUTES * 60)
+
+
+@contextlib.contextmanager
+def atomic_writer(path: str):
+    # Write next to the target and rename over it, so readers only ever see the
+    # old file or the complete new one, never a truncated write.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data):
+    with atomic_writer(path) as f:
+        json.dump(data, f)
+
+
+def write_json_array(f, items: Iterable[Dict]):
+    # Same output as json.dump(list(items), f) without building the list
+    f.write("[")
+    for i, item in enumerate(items):
+        if i:
+            f.write(", ")
+        f.write(json.dumps(item))
+    f.write("]")
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator:
+    # Yields the elements of a top-level JSON array one at a time, reading the
+    # file in chunks instead of decoding it whole.
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer:
+        return
+    if buffer[0] != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buffer, 0)
+    pos = 1
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+            # A number cut at the end of the buffer ("12" of "123", "1.5" of
+            # "1.5e3") still decodes, so an element only counts as complete once
+            # a separator follows it
+            complete = eof or (end < len(buffer) and buffer[end] in " \t\r\n,]")
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        pos = end
+        yield item
+
+
+class OrderIdAllocator:
+    # Hands out ORD-<n> from a persisted, monotonic sequence. IDs are reserved in
+    # blocks so the sequence file is rewritten once per block, not once per order;
+    # a restart skips the unused rest of a block rather than ever reusing an ID.
+    FIRST_ID = 10000  # above the legacy random ORD-1000..9999 range
+    _shared: Optional['OrderIdAllocator'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sequence_file: str = ORDER_SEQUENCE_FILE, block_size: int = ORDER_ID_BLOCK):
+        self.sequence_file = sequence_file
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self.FIRST_ID
+        if os.path.exists(sequence_file):
+            try:
+                with open(sequence_file, "r") as f:
+                    self._next = max(self._next, int(json.load(f)["reserved_until"]))
+            except (json.JSONDecodeError, KeyError, ValueError):
+                pass
+        self._reserved_until = self._next
+
+    @classmethod
+    def shared(cls) -> 'OrderIdAllocator':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _reserve(self, until: int):
+        atomic_write_json(self.sequence_file, {"reserved_until": until})
+        self._reserved_until = until
+
+    def observe(self, order_id: str):
+        # Make sure IDs already in storage are never handed out again. Nothing is
+        # written here; next_id() reserves a new block once _next passes the old one.
+        if not ORDER_ID_PATTERN.fullmatch(order_id or ""):
+            return
+        with self._lock:
+            self._next = max(self._next, int(order_id[4:]) + 1)
+
+    def next_id(self) -> str:
+        with self._lock:
+            if self._next >= self._reserved_until:
+                self._reserve(self._next + self.block_size)
+            number = self._next
+            self._next += 1
+            return f"ORD-{number}"
+
+
+class StorageEngine:
+    def load_all(self) -> List[FoodRequest]:
+        raise NotImplementedError
+
+    def save_all(self, requests: List[FoodRequest]):
+        raise NotImplementedError
+
+    def create(self, request: FoodRequest):
+        raise NotImplementedError
+
+    def update(self, request: FoodRequest):
+        raise NotImplementedError
+
+    def create_many(self, requests: List[FoodRequest]):
+        for request in requests:
+            self.create(request)
+
+    def update_many(self, requests: List[FoodRequest]):
+        for request in requests:
+            self.update(request)
+
+    def delete(self, order_id: str):
+        raise NotImplementedError
+
+    def delete_many(self, order_ids: List[str]):
+        for order_id in order_ids:
+            self.delete(order_id)
+
+    def compact(self):
+        # Only engines that keep a snapshot plus a journal have anything to do
+        pass
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        raise NotImplementedError
+
+    def list_by_status(self, status: str) -> List[FoodRequest]:
+        raise NotImplementedError
+
+    def list_by_users(self, user_names: List[str]) -> List[FoodRequest]:
+        raise NotImplementedError
+
+    def list_by_user(self, user_name: str) -> List[FoodRequest]:
+        return self.list_by_users([user_name])
+
+    def iter_all(self) -> Iterator[FoodRequest]:
+        raise NotImplementedError
+
+    def list_page(self, offset: int = 0, limit: int = 20) -> List[FoodRequest]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def summary(self) -> Dict:
+        raise NotImplementedError
+
+
+class JournalStorage(StorageEngine):
+    def __init__(self, snapshot_file: str = REQUESTS_FILE, journal_file: str = JOURNAL_FILE):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        # The loaded orders themselves (shared with OrderStore), not copies of
+        # them, so compaction streams from the objects already in memory.
+        self._orders: Dict[str, FoodRequest] = {}
+        self._loaded = False
+        self._compacted = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load_all()
+
+    def _append_journal(self, records: List[Dict]):
+        if not records:
+            return
+        with open(self.journal_file, "a") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def create(self, request: FoodRequest):
+        self._append_journal([{"op": "create", "order": request.to_dict()}])
+        self._orders[request.order_id] = request
+
+    def update(self, request: FoodRequest):
+        self._append_journal([{"op": "update", "order": request.to_dict()}])
+        self._orders[request.order_id] = request
+
+    def create_many(self, requests: List[FoodRequest]):
+        # One append and one fsync for the whole batch
+        self._append_journal([{"op": "create", "order": r.to_dict()} for r in requests])
+        for request in requests:
+            self._orders[request.order_id] = request
+
+    def update_many(self, requests: List[FoodRequest]):
+        self._append_journal([{"op": "update", "order": r.to_dict()} for r in requests])
+        for request in requests:
+            self._orders[request.order_id] = request
+
+    def delete(self, order_id: str):
+        self._append_journal([{"op": "delete", "order_id": order_id}])
+        self._orders.pop(order_id, None)
+
+    def delete_many(self, order_ids: List[str]):
+        self._append_journal([{"op": "delete", "order_id": order_id} for order_id in order_ids])
+        for order_id in order_ids:
+            self._orders.pop(order_id, None)
+
+    def save_all(self, requests: List[FoodRequest]):
+        # Whole-list saves are no longer on any hot path; write a fresh snapshot
+        self._orders = {r.order_id: r for r in requests}
+        self.compact()
+
+    def _read_journal(self) -> Dict[str, Optional[Dict]]:
+        # order_id -> latest journaled state, or None if the order was deleted
+        overlay: Dict[str, Optional[Dict]] = {}
+        if not os.path.exists(self.journal_file):
+            return overlay
+        with open(self.journal_file, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves at most one torn trailing line
+                    continue
+                if record.get("op") == "delete":
+                    overlay[record.get("order_id")] = None
+                elif record.get("op") in ("create", "update"):
+                    overlay[record["order"]["order_id"]] = record["order"]
+        return overlay
+
+    def _iter_snapshot(self) -> Iterator[Dict]:
+        if not os.path.exists(self.snapshot_file):
+            return
+        with open(self.snapshot_file, "r") as f:
+            yield from iter_json_array(f)
+
+    def _iter_overlaid_snapshot(self, overlay: Dict[str, Optional[Dict]]) -> Iterator[FoodRequest]:
+        # Snapshot orders with their journaled state applied; the overlay entries
+        # used up here are popped, so what is left are orders only in the journal.
+        for item in self._iter_snapshot():
+            order_id = item.get("order_id")
+            if order_id in overlay:
+                item = overlay.pop(order_id)
+                if item is None:
+                    continue
+            yield FoodRequest.from_dict(item)
+
+    @staticmethod
+    def _iter_journal_only(overlay: Dict[str, Optional[Dict]]) -> Iterator[FoodRequest]:
+        for item in overlay.values():
+            if item is not None:
+                yield FoodRequest.from_dict(item)
+
+    def iter_all(self) -> Iterator[FoodRequest]:
+        # Streams the snapshot with the (small, compacted-on-startup) journal laid
+        # over it, building one FoodRequest at a time.
+        overlay = self._read_journal()
+        yield from self._iter_overlaid_snapshot(overlay)
+        yield from self._iter_journal_only(overlay)
+
+    def load_all(self) -> List[FoodRequest]:
+        self._orders = {}
+        repaired = False
+        overlay = self._read_journal()
+        snapshot = self._iter_overlaid_snapshot(overlay)
+        try:
+            for request in snapshot:
+                repaired |= self._add_loaded(request)
+        except json.JSONDecodeError:
+            # Keep what was readable and move the damaged file aside for recovery
+            snapshot.close()
+            os.replace(self.snapshot_file, f"{self.snapshot_file}.corrupt-{int(time.time())}")
+            repaired = True
+        # Orders only in the journal survive a damaged snapshot too, since the
+        # compaction below empties the journal
+        for request in self._iter_journal_only(overlay):
+            repaired |= self._add_loaded(request)
+        self._loaded = True
+        # Fold the journal back into the snapshot once per process, on startup
+        journal_pending = os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) > 0
+        if not self._compacted and (journal_pending or repaired):
+            self.compact()
+        self._compacted = True
+        return list(self._orders.values())
+
+    def _add_loaded(self, request: FoodRequest) -> bool:
+        # Legacy random IDs can collide; give the later order a fresh one
+        # instead of letting it replace the earlier one. Returns True if it did.
+        repaired = request.order_id in self._orders
+        if repaired:
+            request.order_id = OrderIdAllocator.shared().next_id()
+        self._orders[request.order_id] = request
+        return repaired
+
+    @timed("storage.compact")
+    def compact(self):
+        with atomic_writer(self.snapshot_file) as f:
+            write_json_array(f, (r.to_dict() for r in self._orders.values()))
+        open(self.journal_file, "w").close()
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        self._ensure_loaded()
+        return self._orders.get(order_id)
+
+    def list_by_status(self, status: str) -> List[FoodRequest]:
+        self._ensure_loaded()
+        return [r for r in self._orders.values() if r.delivery_status == status]
+
+    def list_by_users(self, user_names: List[str]) -> List[FoodRequest]:
+        self._ensure_loaded()
+        names = {n.lower() for n in user_names}
+        return [r for r in self._orders.values() if r.user_name.lower() in names]
+
+    def list_page(self, offset: int = 0, limit: int = 20) -> List[FoodRequest]:
+        self._ensure_loaded()
+        return list(itertools.islice(self._orders.values(), offset, offset + limit))
+
+    def count(self) -> int:
+        self._ensure_loaded()
+        return len(self._orders)
+
+    def summary(self) -> Dict:
+        self._ensure_loaded()
+        return OrderStats(self._orders.values()).snapshot()
+
+
+class SQLiteStorage(StorageEngine):
+    COLUMNS = ["order_id", "user_name", "food_type", "quantity", "special_requests",
+               "timestamp", "completed", "delivery_status", "price", "version", "status_history"]
+
+    def __init__(self, db_file: str = SQLITE_FILE):
+        self.db_file = db_file
+        # Flet runs sync handlers on worker threads, so the connection is shared
+        # behind a lock rather than pinned to the thread that opened it.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                "order_id TEXT PRIMARY KEY, user_name TEXT NOT NULL, food_type TEXT NOT NULL, "
+                "quantity INTEGER NOT NULL DEFAULT 1, special_requests TEXT NOT NULL DEFAULT '', "
+                "timestamp TEXT NOT NULL, completed INTEGER NOT NULL DEFAULT 0, "
+                "delivery_status TEXT NOT NULL DEFAULT 'Preparing', price INTEGER NOT NULL DEFAULT 0, "
+                "version INTEGER NOT NULL DEFAULT 0, status_history TEXT NOT NULL DEFAULT '[]')"
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(orders)")}
+            if "version" not in columns:
+                self._conn.execute("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "status_history" not in columns:
+                self._conn.execute("ALTER TABLE orders ADD COLUMN status_history TEXT NOT NULL DEFAULT '[]'")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_name ON orders (user_name COLLATE NOCASE)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (delivery_status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp)")
+        self._import_legacy()
+
+    def _import_legacy(self):
+        if self.count() or not (os.path.exists(REQUESTS_FILE) or os.path.exists(JOURNAL_FILE)):
+            return
+        self.save_all(JournalStorage().load_all())
+
+    @staticmethod
+    def _row(request: FoodRequest) -> tuple:
+        return (request.order_id, request.user_name, request.food_type, request.quantity,
+                request.special_requests, request.timestamp, int(request.completed),
+                request.delivery_status, request.price, request.version, json.dumps(request.status_history))
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> FoodRequest:
+        data = dict(row)
+        data.pop("_rowid", None)
+        data["completed"] = bool(data["completed"])
+        data["status_history"] = json.loads(data.get("status_history") or "[]")
+        return FoodRequest.from_dict(data)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[FoodRequest]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._from_row(r) for r in rows]
+
+    def _upsert(self, requests: List[FoodRequest]):
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO orders ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row(r) for r in requests]
+            )
+
+    def load_all(self) -> List[FoodRequest]:
+        return self._query("SELECT * FROM orders ORDER BY rowid")
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[FoodRequest]:
+        # Keyset pagination on rowid, so the lock is only held per batch
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid AS _rowid, * FROM orders WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]["_rowid"]
+            for row in rows:
+                yield self._from_row(row)
+
+    def save_all(self, requests: List[FoodRequest]):
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (order_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany("INSERT OR IGNORE INTO keep_ids VALUES (?)", [(r.order_id,) for r in requests])
+            self._conn.execute("DELETE FROM orders WHERE order_id NOT IN (SELECT order_id FROM keep_ids)")
+        self._upsert(requests)
+
+    def create(self, request: FoodRequest):
+        self._upsert([request])
+
+    def update(self, request: FoodRequest):
+        self._upsert([request])
+
+    def create_many(self, requests: List[FoodRequest]):
+        self._upsert(requests)
+
+    def update_many(self, requests: List[FoodRequest]):
+        self._upsert(requests)
+
+    def delete(self, order_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+
+    def delete_many(self, order_ids: List[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM orders WHERE order_id = ?", [(order_id,) for order_id in order_ids])
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        found = self._query("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+        return found[0] if found else None
+
+    def list_by_status(self, status: str) -> List[FoodRequest]:
+        return self._query("SELECT * FROM orders WHERE delivery_status = ? ORDER BY rowid", (status,))
+
+    def list_by_users(self, user_names: List[str]) -> List[FoodRequest]:
+        if not user_names:
+            return []
+        placeholders = ", ".join("?" for _ in user_names)
+        return self._query(
+            f"SELECT * FROM orders WHERE user_name COLLATE NOCASE IN ({placeholders}) ORDER BY rowid",
+            tuple(user_names)
+        )
+
+    def list_page(self, offset: int = 0, limit: int = 20) -> List[FoodRequest]:
+        return self._query("SELECT * FROM orders ORDER BY rowid LIMIT ? OFFSET ?", (limit, offset))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            total, completed, revenue = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(completed), 0), COALESCE(SUM(price), 0) FROM orders"
+            ).fetchone()
+            popular = self._conn.execute(
+                "SELECT food_type, SUM(quantity) AS qty FROM orders GROUP BY food_type ORDER BY qty DESC LIMIT 1"
+            ).fetchone()
+        return {
+            "total_orders": total,
+            "completed_orders": completed,
+            "total_revenue": revenue,
+            "most_popular": (popular[0], popular[1]) if popular else ("Hakuna", 0)
+        }
+
+
+class DataManager:
+    engine: Optional[StorageEngine] = None
+
+    @classmethod
+    def get_engine(cls) -> StorageEngine:
+        if cls.engine is None:
+            cls.engine = SQLiteStorage() if STORAGE_BACKEND == "sqlite" else JournalStorage()
+        return cls.engine
+
+    @classmethod
+    @timed("storage.save")
+    def save_requests(cls, requests: List[FoodRequest]):
+        cls.get_engine().save_all(requests)
+
+    @classmethod
+    @timed("storage.load")
+    def load_requests(cls) -> List[FoodRequest]:
+        return cls.get_engine().load_all()
+
+    @classmethod
+    def iter_requests(cls) -> Iterator[FoodRequest]:
+        return cls.get_engine().iter_all()
+
+    @classmethod
+    @timed("storage.create")
+    def record_create(cls, request: FoodRequest):
+        cls.get_engine().create(request)
+
+    @classmethod
+    @timed("storage.update")
+    def record_update(cls, request: FoodRequest):
+        cls.get_engine().update(request)
+
+    @classmethod
+    @timed("storage.create_many")
+    def record_create_many(cls, requests: List[FoodRequest]):
+        cls.get_engine().create_many(requests)
+
+    @classmethod
+    @timed("storage.update_many")
+    def record_update_many(cls, requests: List[FoodRequest]):
+        cls.get_engine().update_many(requests)
+
+    @classmethod
+    @timed("storage.delete")
+    def record_delete(cls, request: FoodRequest):
+        cls.get_engine().delete(request.order_id)
+
+    @classmethod
+    @timed("storage.delete_many")
+    def record_delete_many(cls, requests: List[FoodRequest]):
+        cls.get_engine().delete_many([r.order_id for r in requests])
+
+    @classmethod
+    def compact_storage(cls):
+        cls.get_engine().compact()
+
+    @classmethod
+    def get_request(cls, order_id: str) -> Optional[FoodRequest]:
+        return cls.get_engine().get(order_id)
+
+    @classmethod
+    def requests_by_status(cls, status: str) -> List[FoodRequest]:
+        return cls.get_engine().list_by_status(status)
+
+    @classmethod
+    def requests_by_user(cls, user_name: str) -> List[FoodRequest]:
+        return cls.get_engine().list_by_user(user_name)
+
+    @classmethod
+    def requests_by_users(cls, user_names: List[str]) -> List[FoodRequest]:
+        return cls.get_engine().list_by_users(user_names)
+
+    @classmethod
+    def requests_page(cls, offset: int = 0, limit: int = 20) -> List[FoodRequest]:
+        return cls.get_engine().list_page(offset, limit)
+
+    @classmethod
+    def count_requests(cls) -> int:
+        return cls.get_engine().count()
+
+    @classmethod
+    def summary(cls) -> Dict:
+        return cls.get_engine().summary()
+
+
+class CountingListener:
+    # Base for counters kept in step with OrderStore events. A subclass lists the
+    # fields it reads in TRACKED_FIELDS and implements _apply(values, sign); an
+    # update backs out the order's old values and adds the new ones.
+    TRACKED_FIELDS: tuple = ()
+
+    @classmethod
+    def _values(cls, request: FoodRequest) -> Dict:
+        return {field: getattr(request, field) for field in cls.TRACKED_FIELDS}
+
+    def _apply(self, values: Dict, sign: int):
+        raise NotImplementedError
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        # "archived" orders leave the working set but still count
+        if event == "created":
+            self._apply(self._values(request), 1)
+        elif event == "deleted":
+            self._apply(self._values(request), -1)
+        elif event == "updated":
+            current = self._values(request)
+            if not any(field in current for field in previous):
+                return
+            self._apply({**current, **{k: v for k, v in previous.items() if k in current}}, -1)
+            self._apply(current, 1)
+
+
+class OrderStats(CountingListener):
+    # Running totals kept in step with OrderStore mutations, so the dashboard
+    # reads counters instead of re-scanning every order.
+    TRACKED_FIELDS = ("food_type", "quantity", "price", "completed", "delivery_status", "timestamp")
+
+    def __init__(self, requests: Optional[Iterable[FoodRequest]] = None):
+        self.total_orders = 0
+        self.completed_orders = 0
+        self.total_revenue = 0
+        self.dish_quantities: Counter = Counter()
+        self.status_counts: Counter = Counter()
+        self.daily_orders: Counter = Counter()
+        self.daily_revenue: Counter = Counter()
+        self._most_popular = None
+        for request in requests or []:
+            self._apply(self._values(request), 1)
+
+    def _apply(self, values: Dict, sign: int):
+        day = values["timestamp"][:10]
+        self.total_orders += sign
+        self.completed_orders += sign if values["completed"] else 0
+        self.total_revenue += sign * values["price"]
+        self.dish_quantities[values["food_type"]] += sign * values["quantity"]
+        self.status_counts[values["delivery_status"]] += sign
+        self.daily_orders[day] += sign
+        self.daily_revenue[day] += sign * values["price"]
+        self._most_popular = None
+
+    def to_summary(self) -> Dict:
+        return {
+            "total_orders": self.total_orders,
+            "completed_orders": self.completed_orders,
+            "total_revenue": self.total_revenue,
+            "dish_quantities": dict(self.dish_quantities),
+            "status_counts": dict(self.status_counts),
+            "daily_orders": dict(self.daily_orders),
+            "daily_revenue": dict(self.daily_revenue)
+        }
+
+    def absorb(self, summary: Dict):
+        # Adds totals from to_summary(), e.g. those of archived orders
+        self.total_orders += summary.get("total_orders", 0)
+        self.completed_orders += summary.get("completed_orders", 0)
+        self.total_revenue += summary.get("total_revenue", 0)
+        self.dish_quantities.update(summary.get("dish_quantities", {}))
+        self.status_counts.update(summary.get("status_counts", {}))
+        self.daily_orders.update(summary.get("daily_orders", {}))
+        self.daily_revenue.update(summary.get("daily_revenue", {}))
+        self._most_popular = None
+
+    def most_popular(self) -> tuple:
+        # Bounded by the menu size, and only recomputed after a change
+        if self._most_popular is None:
+            best = max(((dish, qty) for dish, qty in self.dish_quantities.items() if qty > 0),
+                       key=lambda x: x[1], default=("Hakuna", 0))
+            self._most_popular = best
+        return self._most_popular
+
+    def snapshot(self) -> Dict:
+        return {
+            "total_orders": self.total_orders,
+            "completed_orders": self.completed_orders,
+            "total_revenue": self.total_revenue,
+            "most_popular": self.most_popular()
+        }
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.findall(r"\w+", name.lower()))
+
+
+class CustomerIndex:
+    # normalized customer name -> that customer's order_ids, oldest first, kept in
+    # step with OrderStore mutations like OrderStats.
+    def __init__(self, requests: Optional[Iterable[FoodRequest]] = None):
+        self._orders: Dict[str, Dict[str, FoodRequest]] = {}
+        for request in requests or []:
+            self._add(request)
+
+    def _add(self, request: FoodRequest, name: Optional[str] = None):
+        key = normalize_name(request.user_name if name is None else name)
+        self._orders.setdefault(key, {})[request.order_id] = request
+
+    def _remove(self, request: FoodRequest, name: Optional[str] = None):
+        key = normalize_name(request.user_name if name is None else name)
+        orders = self._orders.get(key)
+        if orders is not None:
+            orders.pop(request.order_id, None)
+            if not orders:
+                del self._orders[key]
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        if event == "created":
+            self._add(request)
+        elif event in ("deleted", "archived"):
+            self._remove(request)
+        elif event == "updated" and "user_name" in previous:
+            self._remove(request, previous["user_name"])
+            self._add(request)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._orders
+
+    def orders_for(self, name: str) -> List[FoodRequest]:
+        return list(self._orders.get(normalize_name(name), {}).values())
+
+    def latest_for(self, name: str) -> Optional[FoodRequest]:
+        orders = self._orders.get(normalize_name(name))
+        return next(reversed(orders.values())) if orders else None
+
+    def active_for(self, name: str) -> List[FoodRequest]:
+        return [r for r in self.orders_for(name) if not r.completed and r.delivery_status != "Delivered"]
+
+
+class Recommender(CountingListener):
+    # Order counts for "pendekeza", kept in step with OrderStore mutations like
+    # OrderStats: overall, per customer, per time of day, and which dishes a
+    # customer orders together. A recommendation reads these counters and never
+    # scans the order history.
+    TRACKED_FIELDS = ("user_name", "food_type", "created_at")
+
+    def __init__(self, requests: Optional[Iterable[FoodRequest]] = None):
+        self.popularity: Counter = Counter()
+        self.favorites: Dict[str, Counter] = {}
+        self.by_period: Dict[str, Counter] = {name: Counter() for _, name in DAY_PERIODS}
+        self.together: Dict[str, Counter] = {}
+        # normalized name -> (dish, created_at) of that customer's latest order
+        self._last_order: Dict[str, tuple] = {}
+        for request in requests or []:
+            self.on_event("created", request)
+
+    @staticmethod
+    def period(epoch: Optional[float] = None) -> str:
+        hour = time.localtime(epoch).tm_hour
+        name = DAY_PERIODS[-1][1]
+        for start, period_name in DAY_PERIODS:
+            if hour >= start:
+                name = period_name
+        return name
+
+    def _apply(self, values: Dict, sign: int):
+        dish = values["food_type"]
+        self.popularity[dish] += sign
+        self.favorites.setdefault(normalize_name(values["user_name"]), Counter())[dish] += sign
+        self.by_period[self.period(values["created_at"])][dish] += sign
+
+    def _pair(self, request: FoodRequest):
+        # Co-ordering only grows: a deleted order still says the two dishes go together
+        name = normalize_name(request.user_name)
+        last = self._last_order.get(name)
+        dish = request.food_type
+        if last and last[0] != dish and abs(request.created_at - last[1]) <= CO_ORDER_MINUTES * 60:
+            self.together.setdefault(last[0], Counter())[dish] += 1
+            self.together.setdefault(dish, Counter())[last[0]] += 1
+        self._last_order[name] = (dish, request.created_at)
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        super().on_event(event, request, previous)
+        if event == "created":
+            self._pair(request)
+
+    def to_summary(self) -> Dict:
+        return {
+            "popularity": dict(self.popularity),
+            "favorites": {name: dict(counts) for name, counts in self.favorites.items()},
+            "by_period": {period: dict(counts) for period, counts in self.by_period.items()},
+            "together": {dish: dict(counts) for dish, counts in self.together.items()}
+        }
+
+    def absorb(self, summary: Dict):
+        # Adds counters from to_summary(), e.g. those of archived orders
+        self.popularity.update(summary.get("popularity", {}))
+        for field in ("favorites", "by_period", "together"):
+            counters = getattr(self, field)
+            for key, counts in summary.get(field, {}).items():
+                counters.setdefault(key, Counter()).update(counts)
+
+    def recommend(self, name: Optional[str] = None, now: Optional[float] = None, limit: int = 3) -> List[tuple]:
+        # Up to limit (dish, reason, context) picks, best first. reason is one of
+        # "favorite", "together" (context: the favorite), "time" (context: the
+        # period), "popular" or "menu"; every counter is bounded by the menu size.
+        catalog = MenuCatalog.current()
+        picks: List[tuple] = []
+        chosen = set()
+
+        def take(counts: Optional[Counter], reason: str, context: Optional[str] = None, wanted: int = 1):
+            for dish, count in (counts.most_common() if counts else []):
+                if len(picks) >= limit or wanted <= 0 or count <= 0:
+                    return
+                if dish in catalog.prices and dish not in chosen:
+                    picks.append((dish, reason, context))
+                    chosen.add(dish)
+                    wanted -= 1
+
+        if name:
+            take(self.favorites.get(normalize_name(name)), "favorite")
+            if picks:
+                take(self.together.get(picks[0][0]), "together", picks[0][0])
+        period = self.period(now)
+        take(self.by_period[period], "time", period)
+        take(self.popularity, "popular", wanted=limit)
+        for dish in catalog.ranked:
+            if len(picks) >= limit:
+                break
+            if dish not in chosen:
+                picks.append((dish, "menu", None))
+                chosen.add(dish)
+        return picks
+
+
+class SalesAnalytics(CountingListener):
+    # Hourly and daily rollups kept in step with OrderStore mutations like
+    # OrderStats, plus how long orders spend in each delivery stage. The rollups
+    # are saved to ANALYTICS_FILE (debounced), so a restart reuses them instead of
+    # bucketing every order again and a report only reads one row per day.
+    TRACKED_FIELDS = ("food_type", "quantity", "price", "created_at")
+
+    def __init__(self, requests: Optional[Iterable[FoodRequest]] = None, path: str = ANALYTICS_FILE):
+        self.path = path
+        self.totals = [0, 0]  # [orders, revenue]
+        self.hourly: Dict[str, List[int]] = {}  # "YYYY-MM-DD HH" -> [orders, revenue]
+        self.daily: Dict[str, List[int]] = {}  # "YYYY-MM-DD" -> [orders, revenue]
+        self.daily_dishes: Dict[str, Counter] = {}
+        self.stage_seconds: Dict[str, List[float]] = {}  # status -> [total seconds, orders timed]
+        # order_id -> (status, epoch it entered that status), for orders still moving
+        self._entered: Dict[str, tuple] = {}
+        # "YYYY-MM-DD HH" keys by local (year, month, day, hour)
+        self._hour_keys: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        for request in requests or []:
+            self._apply(self._values(request), 1)
+            self._time_history(request)
+            self._start_stage(request)
+
+    @classmethod
+    def load(cls, requests: Iterable[FoodRequest], stats: OrderStats, path: str = ANALYTICS_FILE,
+             archived: Iterable[FoodRequest] = ()) -> 'SalesAnalytics':
+        # The saved summary is trusted only if its totals match the orders that
+        # were just loaded; otherwise the rollups are rebuilt from the orders,
+        # which is the only time the archived ones are read.
+        try:
+            with open(path) as f:
+                summary = json.load(f)
+            if summary["totals"] != [stats.total_orders, stats.total_revenue]:
+                raise ValueError("summary is out of date")
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(itertools.chain(archived, requests), path)
+        analytics = cls(path=path)
+        analytics.totals = summary["totals"]
+        analytics.hourly = summary["hourly"]
+        analytics.daily = summary["daily"]
+        analytics.daily_dishes = {day: Counter(dishes) for day, dishes in summary["daily_dishes"].items()}
+        analytics.stage_seconds = summary["stage_seconds"]
+        for request in requests:
+            analytics._start_stage(request)
+        return analytics
+
+    def _hour_key(self, epoch: int) -> str:
+        hour = time.localtime(epoch)[:4]
+        key = self._hour_keys.get(hour)
+        if key is None:
+            key = self._hour_keys[hour] = "%04d-%02d-%02d %02d" % hour
+        return key
+
+    def _apply(self, values: Dict, sign: int):
+        hour = self._hour_key(values["created_at"])
+        day = hour[:10]
+        for bucket in (self.totals, self.hourly.setdefault(hour, [0, 0]), self.daily.setdefault(day, [0, 0])):
+            bucket[0] += sign
+            bucket[1] += sign * values["price"]
+        self.daily_dishes.setdefault(day, Counter())[values["food_type"]] += sign * values["quantity"]
+
+    def _time_history(self, request: FoodRequest):
+        # A rebuild times every stage an order has finished from its status history
+        status, entered_at = DELIVERY_STATUSES[0], request.created_at
+        for next_status, changed_at in request.status_changes():
+            timed = self.stage_seconds.setdefault(status, [0, 0])
+            timed[0] += changed_at - entered_at
+            timed[1] += 1
+            status, entered_at = next_status, changed_at
+
+    def _start_stage(self, request: FoodRequest):
+        # Orders saved before status histories existed only have a known entry
+        # time while they are still in the first stage
+        if request.completed or request.delivery_status == DELIVERY_STATUSES[-1]:
+            return
+        if request.has_status_history or request.delivery_status == DELIVERY_STATUSES[0]:
+            self._entered[request.order_id] = (request.delivery_status, request.status_entered_at())
+
+    def _finish_stage(self, request: FoodRequest, previous_status: str, now: float):
+        entered = self._entered.pop(request.order_id, None)
+        if entered and entered[0] == previous_status:
+            timed = self.stage_seconds.setdefault(previous_status, [0, 0])
+            timed[0] += now - entered[1]
+            timed[1] += 1
+        if not request.completed and request.delivery_status != DELIVERY_STATUSES[-1]:
+            self._entered[request.order_id] = (request.delivery_status, now)
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        with self._lock:
+            super().on_event(event, request, previous)
+            if event == "created":
+                self._start_stage(request)
+            elif event == "deleted":
+                self._entered.pop(request.order_id, None)
+            elif event == "updated":
+                if "delivery_status" in previous and previous["delivery_status"] != request.delivery_status:
+                    self._finish_stage(request, previous["delivery_status"], request.status_entered_at())
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(ANALYTICS_SAVE_SECONDS, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            summary = json.dumps({
+                "totals": self.totals,
+                "hourly": self.hourly,
+                "daily": self.daily,
+                "daily_dishes": self.daily_dishes,
+                "stage_seconds": self.stage_seconds
+            })
+        with atomic_writer(self.path) as f:
+            f.write(summary)
+
+    def stage_minutes(self) -> Dict[str, float]:
+        # Average minutes spent in each stage, over every transition timed so far
+        with self._lock:
+            return {status: round(total / count / 60, 1) for status, (total, count) in self.stage_seconds.items() if count}
+
+    @staticmethod
+    def last_days(days: int, now: Optional[float] = None) -> List[str]:
+        today = datetime.fromtimestamp(now if now is not None else time.time()).date()
+        return [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+    def report(self, days: int = 30, now: Optional[float] = None) -> Dict:
+        # Reads days * 24 hourly rows at most, however many orders there are
+        day_keys = self.last_days(days, now)
+        dishes: Counter = Counter()
+        orders_by_hour = [0] * 24
+        with self._lock:
+            rows = [(day, *self.daily.get(day, (0, 0))) for day in day_keys]
+            for day in day_keys:
+                dishes.update(self.daily_dishes.get(day, {}))
+                for hour in range(24):
+                    orders_by_hour[hour] += self.hourly.get(f"{day} {hour:02d}", (0, 0))[0]
+        return {
+            "days": rows,
+            "orders": sum(row[1] for row in rows),
+            "revenue": sum(row[2] for row in rows),
+            "dishes": [(dish, qty) for dish, qty in dishes.most_common() if qty > 0],
+            "orders_by_hour": orders_by_hour,
+            "stage_minutes": self.stage_minutes()
+        }
+
+    def export_csv(self, path: str = REPORT_FILE, days: int = 30, now: Optional[float] = None) -> str:
+        # One row per day: orders, revenue and the quantity sold of every dish
+        day_keys = self.last_days(days, now)
+        with self._lock:
+            daily = [(day, self.daily.get(day, (0, 0)), dict(self.daily_dishes.get(day, {}))) for day in day_keys]
+        dishes = sorted({dish for _, _, sold in daily for dish in sold})
+        with atomic_writer(path) as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(["day", "orders", "revenue", *dishes])
+            for day, (orders, revenue), sold in daily:
+                writer.writerow([day, orders, revenue, *(sold.get(dish, 0) for dish in dishes)])
+        return path
+
+
+class OrderArchive:
+    # Completed orders older than ARCHIVE_AFTER_DAYS move out of the working set
+    # into gzip JSON-lines files, one per month of order date. index.json keeps,
+    # per partition, the order-number range, the customers, the stats totals and
+    # the recommender counters, so startup never reads the archive and a lookup
+    # only opens partitions that can hold the answer.
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._running = False
+        try:
+            with open(self.index_file) as f:
+                self.index: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self._customers = {name for entry in self.index.values() for name in entry["customers"]}
+
+    @staticmethod
+    def partition_of(request: FoodRequest) -> str:
+        return datetime.fromtimestamp(request.created_at).strftime("%Y-%m")
+
+    @staticmethod
+    def order_number(order_id: str) -> Optional[int]:
+        try:
+            return int(order_id.rsplit("-", 1)[-1])
+        except ValueError:
+            return None
+
+    def _path(self, partition: str) -> str:
+        return os.path.join(self.directory, f"orders-{partition}.jsonl.gz")
+
+    def __len__(self) -> int:
+        return sum(entry["stats"]["total_orders"] for entry in self.index.values())
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._customers
+
+    def write(self, requests: List[FoodRequest]):
+        # Appends a gzip member per partition, then rewrites the index; callers
+        # drop the orders from the working set only after this returns.
+        partitions: Dict[str, List[FoodRequest]] = {}
+        for request in requests:
+            partitions.setdefault(self.partition_of(request), []).append(request)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for partition, batch in partitions.items():
+                with open(self._path(partition), "ab") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                        f.write("".join(json.dumps(r.to_dict()) + "\n" for r in batch).encode("utf-8"))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                entry = self.index.get(partition) or {"first": None, "last": None, "customers": [], "stats": {}}
+                numbers = [n for n in (self.order_number(r.order_id) for r in batch) if n is not None]
+                numbers += [n for n in (entry["first"], entry["last"]) if n is not None]
+                names = {normalize_name(r.user_name) for r in batch}
+                stats = OrderStats(batch)
+                stats.absorb(entry["stats"])
+                # Co-ordered dishes are only paired within the batch being archived
+                recommender = Recommender(sorted(batch, key=lambda r: r.created_at))
+                recommender.absorb(entry.get("recommender", {}))
+                self.index[partition] = {
+                    "first": min(numbers, default=None),
+                    "last": max(numbers, default=None),
+                    "customers": sorted(names.union(entry["customers"])),
+                    "stats": stats.to_summary(),
+                    "recommender": recommender.to_summary()
+                }
+                self._customers |= names
+            atomic_write_json(self.index_file, self.index)
+
+    def _read(self, partition: str) -> Iterator[FoodRequest]:
+        with gzip.open(self._path(partition), "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield FoodRequest.from_dict(json.loads(line))
+
+    def iter_all(self) -> Iterator[FoodRequest]:
+        for partition in sorted(self.index):
+            yield from self._read(partition)
+
+    def _may_hold(self, entry: Dict, order_id: str) -> bool:
+        number = self.order_number(order_id)
+        return number is None or entry["first"] is None or entry["first"] <= number <= entry["last"]
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        for partition, entry in sorted(self.index.items(), reverse=True):
+            if not self._may_hold(entry, order_id):
+                continue
+            for request in self._read(partition):
+                if request.order_id == order_id:
+                    return request
+        return None
+
+    def archived_ids(self, requests: Iterable[FoodRequest]) -> set:
+        # Which of requests already have a copy in the archive; only the
+        # partitions whose range covers one of them are read
+        wanted: Dict[str, set] = {}
+        for request in requests:
+            partition = self.partition_of(request)
+            entry = self.index.get(partition)
+            if entry is not None and self._may_hold(entry, request.order_id):
+                wanted.setdefault(partition, set()).add(request.order_id)
+        found = set()
+        for partition, order_ids in wanted.items():
+            found.update(r.order_id for r in self._read(partition) if r.order_id in order_ids)
+        return found
+
+    def latest_for(self, name: str) -> Optional[FoodRequest]:
+        key = normalize_name(name)
+        if key not in self._customers:
+            return None
+        for partition, entry in sorted(self.index.items(), reverse=True):
+            if key in entry["customers"]:
+                found = [r for r in self._read(partition) if normalize_name(r.user_name) == key]
+                if found:
+                    return max(found, key=lambda r: r.created_at)
+        return None
+
+    def summary(self) -> Dict:
+        # The stats totals of every archived order, for OrderStats.absorb()
+        stats = OrderStats()
+        for entry in self.index.values():
+            stats.absorb(entry["stats"])
+        return stats.to_summary()
+
+    def recommender_summary(self) -> Dict:
+        # The recommender counters of every archived order, for Recommender.absorb()
+        recommender = Recommender()
+        for entry in self.index.values():
+            recommender.absorb(entry.get("recommender", {}))
+        return recommender.to_summary()
+
+    def start(self, service: 'OrderService', interval: float = ARCHIVE_INTERVAL_SECONDS):
+        # One archiving loop per server process, whichever session starts it
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, args=(service, interval), name="order-archive", daemon=True).start()
+
+    def _run(self, service: 'OrderService', interval: float):
+        while True:
+            try:
+                service.archive_completed()
+            except Exception:
+                # A failed pass only delays archiving; the orders stay in the working set
+                logger.exception("archiving completed orders failed")
+            time.sleep(interval)
 
-    def to_dict(self) -> Dict:
-        return {
-            "user_name": self.user_name,
-            "food_type": self.food_type,
-            "quantity": self.quantity,
-            "special_requests": self.special_requests,
-            "timestamp": self.timestamp,
-            "completed": self.completed,
-            "delivery_status": self.delivery_status,
-            "order_id": self.order_id,
-            "price": self.price
-        }
+
+class OrderStore:
+    # One store per server process: every Flet session reads and mutates the same
+    # orders, and each mutation is appended to storage under the store lock.
+    _shared: Optional['OrderStore'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._orders: Dict[str, FoodRequest] = {r.order_id: r for r in DataManager.load_requests()}
+        allocator = OrderIdAllocator.shared()
+        for order_id in self._orders:
+            allocator.observe(order_id)
+        self._listeners: List[Callable] = []
+        self.archive = OrderArchive()
+        # A crash between archive.write() and the journal delete in
+        # archive_completed() leaves an order in both places. The archive copy
+        # wins: finish the move here so the order is neither counted nor
+        # archived twice.
+        stranded = self.archive.archived_ids(r for r in self._orders.values() if r.completed)
+        if stranded:
+            DataManager.record_delete_many([self._orders.pop(order_id) for order_id in stranded])
+        # Bumped on every mutation, so a view can tell whether it is out of date
+        self.revision = 0
+        self.stats = OrderStats(self._orders.values())
+        self.stats.absorb(self.archive.summary())
+        self.subscribe(self.stats.on_event)
+        self.customers = CustomerIndex(self._orders.values())
+        self.subscribe(self.customers.on_event)
+        self.recommender = Recommender(self._orders.values())
+        self.recommender.absorb(self.archive.recommender_summary())
+        self.subscribe(self.recommender.on_event)
+        self.analytics = SalesAnalytics.load(self._orders.values(), self.stats, archived=self.archive.iter_all())
+        self.subscribe(self.analytics.on_event)
+
+    def subscribe(self, listener: Callable):
+        # Listeners run under the store lock as listener(event, request, previous),
+        # where previous holds the old values of the fields an update changed.
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        self.revision += 1
+        for listener in list(self._listeners):
+            listener(event, request, previous)
 
     @classmethod
-    def from_dict(cls, data: Dict) -> 'FoodRequest':
-        request = cls(
-            data["user_name"],
-            data["food_type"],
-            data.get("quantity", 1),
-            data.get("special_requests", "")
-        )
-        request.timestamp = data["timestamp"]
-        request.completed = data["completed"]
-        request.delivery_status = data.get("delivery_status", "Preparing")
-        request.order_id = data.get("order_id", f"ORD-{random.randint(1000, 9999)}")
-        request.price = data.get("price", 0)
-        return request
+    def shared(cls) -> 'OrderStore':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def all(self) -> List[FoodRequest]:
+        with self._lock:
+            return list(self._orders.values())
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        return self._orders.get(order_id)
+
+    def find(self, order_id: str) -> Optional[FoodRequest]:
+        # Falls back to the archive, which means reading a partition file
+        request = self._orders.get(order_id)
+        return request if request is not None else self.archive.get(order_id)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def page(self, offset: int, limit: int) -> List[FoodRequest]:
+        # Newest first, so the admin dashboard opens on the latest orders
+        with self._lock:
+            return list(itertools.islice(reversed(self._orders.values()), offset, offset + limit))
+
+    def _check_version(self, request: FoodRequest, expected_version: Optional[int]):
+        if expected_version is not None and request.version != expected_version:
+            raise StaleOrderError(
+                f"{request.order_id} is at version {request.version}, expected {expected_version}"
+            )
+
+    def add(self, request: FoodRequest) -> FoodRequest:
+        with self._lock:
+            while request.order_id in self._orders:
+                request.order_id = OrderIdAllocator.shared().next_id()
+            self._orders[request.order_id] = request
+            DataManager.record_create(request)
+            self._notify("created", request)
+            return request
+
+    def add_many(self, requests: List[FoodRequest]) -> List[FoodRequest]:
+        with self._lock:
+            for request in requests:
+                while request.order_id in self._orders:
+                    request.order_id = OrderIdAllocator.shared().next_id()
+                self._orders[request.order_id] = request
+            DataManager.record_create_many(requests)
+            for request in requests:
+                self._notify("created", request)
+            return requests
+
+    def update_many(self, order_ids: Iterable[str], from_status: Optional[str] = None, **changes) -> List[FoodRequest]:
+        # Applies the same changes to every listed order in one storage write.
+        # Bulk edits are admin overrides, so there is no version check; with
+        # from_status, orders that have since left that status are skipped.
+        with self._lock:
+            updated = []
+            previous_values = []
+            now = time.time()
+            for order_id in order_ids:
+                request = self._orders.get(order_id)
+                if request is None or (from_status is not None and request.delivery_status != from_status):
+                    continue
+                previous = {field: getattr(request, field) for field in changes}
+                previous_values.append(previous)
+                for field, value in changes.items():
+                    setattr(request, field, value)
+                if previous.get("delivery_status", request.delivery_status) != request.delivery_status:
+                    request.record_status(now)
+                request.version += 1
+                updated.append(request)
+            DataManager.record_update_many(updated)
+            for request, previous in zip(updated, previous_values):
+                self._notify("updated", request, previous)
+            return updated
+
+    def update(self, order_id: str, expected_version: Optional[int] = None, **changes) -> FoodRequest:
+        with self._lock:
+            request = self._orders.get(order_id)
+            if request is None:
+                raise KeyError(order_id)
+            self._check_version(request, expected_version)
+            previous = {field: getattr(request, field) for field in changes}
+            for field, value in changes.items():
+                setattr(request, field, value)
+            if previous.get("delivery_status", request.delivery_status) != request.delivery_status:
+                request.record_status()
+            request.version += 1
+            DataManager.record_update(request)
+            self._notify("updated", request, previous)
+            return request
+
+    def delete(self, order_id: str, expected_version: Optional[int] = None) -> FoodRequest:
+        with self._lock:
+            request = self._orders.get(order_id)
+            if request is None:
+                raise KeyError(order_id)
+            self._check_version(request, expected_version)
+            del self._orders[order_id]
+            DataManager.record_delete(request)
+            self._notify("deleted", request)
+            return request
+
+    def archive_completed(self, cutoff: float) -> List[FoodRequest]:
+        # Completed orders whose last status change is before cutoff go to the
+        # archive first and leave the working set second, so a crash in between
+        # can only leave an order in both places, never in neither.
+        with self._lock:
+            old = [r for r in self._orders.values() if r.completed and r.status_entered_at() < cutoff]
+            if not old:
+                return []
+            self.archive.write(old)
+            for request in old:
+                del self._orders[request.order_id]
+            DataManager.record_delete_many(old)
+            # Rewrite the snapshot now so the working set on disk shrinks too. This
+            # stays under the store lock: compaction truncates the journal, so an
+            # append landing mid-compaction would otherwise be lost.
+            DataManager.compact_storage()
+            for request in old:
+                self._notify("archived", request)
+            return old
+
+
+class OrderService:
+    # The order workflow without any Flet dependency: the views call this, and
+    # so do benchmark.py and any other headless caller.
+    def __init__(self, store: Optional[OrderStore] = None):
+        self.store = store if store is not None else OrderStore.shared()
+
+    def place_order(self, user_name: str, food_type: str, quantity=1, special_requests: str = "") -> FoodRequest:
+        return self.store.add(self.build_order(user_name, food_type, quantity, special_requests))
+
+    def build_order(self, user_name: str, food_type: str, quantity=1, special_requests: str = "") -> FoodRequest:
+        if not user_name or not food_type:
+            raise OrderValidationError("Tafadhali jaza sehemu zinazohitajika")
+        if food_type not in MenuCatalog.current().prices:
+            raise OrderValidationError("Chakula hiki hakipo kwenye menyu")
+        # Whole numbers only: the form and CSV give strings, JSON lines may give
+        # numbers, and 2.7 must not quietly become 2
+        if isinstance(quantity, str) and quantity.strip().isdigit():
+            quantity = int(quantity)
+        elif isinstance(quantity, float) and quantity.is_integer():
+            quantity = int(quantity)
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise OrderValidationError("Tafadhali weka idadi sahihi")
+        return FoodRequest(user_name, food_type, quantity, special_requests or "")
+
+    def place_orders(self, rows: Iterable[Dict]) -> tuple:
+        # Validates every row first, then stores the valid ones in a single write.
+        # Returns (placed orders, [(row number, error message), ...]).
+        orders = []
+        errors = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                if not isinstance(row, dict):
+                    raise OrderValidationError("Mstari si sahihi")
+                orders.append(self.build_order(
+                    self._row_text(row, "user_name").strip(),
+                    self._row_text(row, "food_type").strip(),
+                    self._row_quantity(row),
+                    self._row_text(row, "special_requests")
+                ))
+            except OrderValidationError as error:
+                errors.append((number, str(error)))
+        if orders:
+            self.store.add_many(orders)
+        return orders, errors
 
-# ======================
-# CORE FUNCTIONALITY
-# ======================
-class DataManager:
     @staticmethod
-    def save_requests(requests: List[FoodRequest]):
-        with open(REQUESTS_FILE, "w") as f:
-            json.dump([req.to_dict() for req in requests], f)
+    def _row_text(row: Dict, key: str) -> str:
+        value = row.get(key)
+        if value is None:
+            return ""
+        if not isinstance(value, str):
+            raise OrderValidationError(f"{key} lazima iwe maandishi")
+        return value
 
     @staticmethod
-    def load_requests() -> List[FoodRequest]:
-        if not os.path.exists(REQUESTS_FILE):
-            return []
+    def _row_quantity(row: Dict):
+        # Only a missing or blank quantity means 1; build_order rejects 0
+        quantity = row.get("quantity")
+        return 1 if quantity is None or quantity == "" else quantity
+
+    @staticmethod
+    def _json_row(line: str):
+        # A line that isn't JSON becomes None, reported by place_orders like any bad row
         try:
-            with open(REQUESTS_FILE, "r") as f:
-                data = json.load(f)
-                return [FoodRequest.from_dict(item) for item in data]
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+    def import_orders(self, path: str) -> tuple:
+        # CSV with a user_name,food_type,quantity,special_requests header, or
+        # JSON lines with the same keys
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            if path.lower().endswith((".jsonl", ".ndjson")):
+                rows = [self._json_row(line) for line in f if line.strip()]
+            else:
+                rows = list(csv.DictReader(f))
+        return self.place_orders(rows)
+
+    def bulk_update_status(self, order_ids: Iterable[str], status: str,
+                           from_status: Optional[str] = None) -> List[FoodRequest]:
+        if status not in DELIVERY_STATUSES:
+            raise OrderValidationError(f"Hali '{status}' haijulikani")
+        return self.store.update_many(order_ids, from_status, delivery_status=status)
+
+    def advance_all(self, from_status: str, to_status: str) -> List[FoodRequest]:
+        # e.g. advance_all("Cooking", "On the way")
+        order_ids = [r.order_id for r in self.store.all() if r.delivery_status == from_status]
+        return self.bulk_update_status(order_ids, to_status, from_status)
+
+    def update_status(self, order_id: str, status: str, expected_version: Optional[int] = None) -> FoodRequest:
+        if status not in DELIVERY_STATUSES:
+            raise OrderValidationError(f"Hali '{status}' haijulikani")
+        return self.store.update(order_id, expected_version, delivery_status=status)
+
+    def toggle_complete(self, order_id: str, expected_version: Optional[int] = None) -> FoodRequest:
+        request = self.store.get(order_id)
+        if request is None:
+            raise KeyError(order_id)
+        changes = {"completed": not request.completed}
+        if changes["completed"]:
+            changes["delivery_status"] = "Delivered"
+        return self.store.update(order_id, expected_version, **changes)
+
+    def delete(self, order_id: str, expected_version: Optional[int] = None) -> FoodRequest:
+        return self.store.delete(order_id, expected_version)
+
+    def get(self, order_id: str) -> Optional[FoodRequest]:
+        return self.store.get(order_id)
+
+    def find(self, order_id: str) -> Optional[FoodRequest]:
+        return self.store.find(order_id)
+
+    def archive_completed(self, days: int = ARCHIVE_AFTER_DAYS) -> List[FoodRequest]:
+        return self.store.archive_completed(time.time() - days * 86400)
+
+    def list_page(self, page_number: int, page_size: int = ADMIN_PAGE_SIZE) -> List[FoodRequest]:
+        return self.store.page(page_number * page_size, page_size)
+
+    def count(self) -> int:
+        return len(self.store)
+
+    def stats(self) -> Dict:
+        return self.store.stats.snapshot()
+
+    def sales_report(self, days: int = REPORT_DAYS) -> Dict:
+        return self.store.analytics.report(days)
+
+    def export_sales_report(self, path: str = REPORT_FILE, days: int = REPORT_DAYS) -> str:
+        return self.store.analytics.export_csv(path, days)
+
+
+class KitchenScheduler:
+    # Pending ("Preparing") orders wait in a priority queue; whenever a station is
+    # free the head order is started together with up to batch_size queued orders
+    # of the same dish. Orders go to "Cooking" when their batch starts and to
+    # "On the way" when it is ready. Queue entries are dropped lazily, so a tick
+    # costs O(batches started * log n) rather than a pass over the queue.
+    _shared: Optional['KitchenScheduler'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, service: OrderService, stations: int = KITCHEN_STATIONS, batch_size: int = KITCHEN_BATCH_SIZE):
+        self.service = service
+        self.stations = stations
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        # Entries are (priority, created_at, seq, order_id, dish); only the entry
+        # currently in _queued for an order_id is live.
+        self._queue: List[tuple] = []
+        self._by_dish: Dict[str, List[tuple]] = {}
+        self._queued: Dict[str, tuple] = {}
+        self._cooking: List[Dict] = []
+        self._seq = itertools.count()
+        self._etas: Optional[Dict[str, float]] = None
+        self._next_free = 0.0
+        self._running = False
+        now = time.time()
+        recovered: Dict[str, List[str]] = {}
+        for request in service.store.all():
+            if request.completed:
+                continue
+            if request.delivery_status == "Preparing":
+                self._enqueue(request)
+            elif request.delivery_status == "Cooking":
+                recovered.setdefault(request.food_type, []).append(request.order_id)
+        # Orders already cooking at startup are treated as batches started now
+        for dish, order_ids in recovered.items():
+            self._cooking.append({"dish": dish, "order_ids": order_ids, "ready_at": now + prep_seconds(dish)})
+        service.store.subscribe(self.on_event)
+
+    @classmethod
+    def shared(cls) -> 'KitchenScheduler':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(OrderService(OrderStore.shared()))
+            return cls._shared
+
+    def _enqueue(self, request: FoodRequest, priority: int = 0):
+        entry = (priority, request.created_at, next(self._seq), request.order_id, request.food_type)
+        heapq.heappush(self._queue, entry)
+        heapq.heappush(self._by_dish.setdefault(request.food_type, []), entry)
+        self._queued[request.order_id] = entry
+        self._etas = None
+
+    def _is_live(self, entry: tuple) -> bool:
+        return self._queued.get(entry[3]) is entry
+
+    def _pop_live(self, heap: List[tuple]) -> Optional[tuple]:
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heapq.heappop(heap) if heap else None
+
+    def expedite(self, order_id: str) -> bool:
+        # Moves a queued order ahead of everything with normal priority (the
+        # admin's "Harakisha" button); False if it is no longer waiting
+        with self._lock:
+            request = self.service.get(order_id)
+            if order_id not in self._queued or request is None:
+                return False
+            if not self.is_expedited(order_id):
+                self._enqueue(request, priority=-1)
+            return True
+
+    def is_expedited(self, order_id: str) -> bool:
+        entry = self._queued.get(order_id)
+        return entry is not None and entry[0] < 0
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict] = None):
+        with self._lock:
+            order_id = request.order_id
+            pending = not request.completed and request.delivery_status == "Preparing"
+            if event == "deleted" or request.completed or request.delivery_status != "Cooking":
+                # Includes an order sent back from Cooking to Preparing, which must
+                # not be finished with its old batch
+                for batch in self._cooking:
+                    if order_id in batch["order_ids"]:
+                        batch["order_ids"].remove(order_id)
+                        self._etas = None
+            if event != "deleted" and pending:
+                if order_id not in self._queued:
+                    self._enqueue(request)
+                return
+            if self._queued.pop(order_id, None) is not None:
+                self._etas = None
+
+    def _next_batch(self, now: float) -> Optional[Dict]:
+        head = self._pop_live(self._queue)
+        if head is None:
+            return None
+        dish = head[4]
+        order_ids = [head[3]]
+        del self._queued[head[3]]
+        while len(order_ids) < self.batch_size:
+            entry = self._pop_live(self._by_dish.get(dish, []))
+            if entry is None:
+                break
+            order_ids.append(entry[3])
+            del self._queued[entry[3]]
+        return {"dish": dish, "order_ids": order_ids, "ready_at": now + prep_seconds(dish)}
+
+    def tick(self, now: Optional[float] = None):
+        now = now or time.time()
+        with self._lock:
+            done = [b for b in self._cooking if b["ready_at"] <= now]
+            self._cooking = [b for b in self._cooking if b["ready_at"] > now]
+            started = []
+            while len(self._cooking) < self.stations:
+                batch = self._next_batch(now)
+                if batch is None:
+                    break
+                self._cooking.append(batch)
+                started.append(batch)
+            if done or started:
+                self._etas = None
+        # Store updates happen outside our lock: the store calls on_event while
+        # holding its own lock, so taking ours first here could deadlock. An
+        # admin may change an order in between, so each update only applies to
+        # orders still in the status the batch expects.
+        finished = [order_id for b in done for order_id in b["order_ids"]]
+        if finished:
+            self.service.bulk_update_status(finished, "On the way", from_status="Cooking")
+        begun = [order_id for b in started for order_id in b["order_ids"]]
+        if begun:
+            self.service.bulk_update_status(begun, "Cooking", from_status="Preparing")
+
+    def _simulate(self, now: float) -> Dict[str, float]:
+        # Replays the dispatch rule over the current queue to get the time each
+        # order leaves the kitchen. Only rerun after the queue or batches change.
+        etas: Dict[str, float] = {}
+        stations = [max(b["ready_at"], now) for b in self._cooking]
+        stations += [now] * max(0, self.stations - len(stations))
+        heapq.heapify(stations)
+        for batch in self._cooking:
+            for order_id in batch["order_ids"]:
+                etas[order_id] = batch["ready_at"]
+        queue = sorted(e for e in self._queued.values())
+        by_dish: Dict[str, deque] = {}
+        for entry in queue:
+            by_dish.setdefault(entry[4], deque()).append(entry)
+        for entry in queue:
+            if entry[3] in etas:
+                continue
+            ready = heapq.heappop(stations) + prep_seconds(entry[4])
+            same_dish = by_dish[entry[4]]
+            taken = 0
+            while same_dish and taken < self.batch_size:
+                order_id = same_dish.popleft()[3]
+                if order_id not in etas:
+                    etas[order_id] = ready
+                    taken += 1
+            heapq.heappush(stations, ready)
+        self._next_free = stations[0] if stations else now
+        return etas
+
+    def _current_etas(self, now: float) -> Dict[str, float]:
+        with self._lock:
+            if self._etas is None:
+                self._etas = self._simulate(now)
+            return self._etas
+
+    def eta_minutes(self, order_id: str, now: Optional[float] = None) -> Optional[int]:
+        # Minutes until the order reaches the customer, or None if it has left the kitchen
+        now = now or time.time()
+        ready_at = self._current_etas(now).get(order_id)
+        if ready_at is None:
+            return None
+        return max(1, round((ready_at - now) / 60)) + DELIVERY_MINUTES
+
+    def estimate_new_order_minutes(self, food_type: Optional[str] = None, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        self._current_etas(now)
+        prep = prep_seconds(food_type) if food_type else MenuCatalog.current().max_prep_seconds
+        return max(1, round((max(self._next_free, now) - now + prep) / 60)) + DELIVERY_MINUTES
+
+    def start(self, page: ft.Page):
+        # One kitchen loop per server process, whichever session starts it
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        page.run_task(self.run)
+
+    async def run(self, interval: float = KITCHEN_TICK_SECONDS):
+        try:
+            loop = asyncio.get_running_loop()
+            while True:
+                # Status updates append to the journal; keep that off the event loop
+                await loop.run_in_executor(None, self.tick)
+                await asyncio.sleep(interval)
+        finally:
+            self._running = False
+
+
+class OrderEventBus:
+    # Fans order events out to every connected session. The store listener only
+    # snapshots each event and queues it; a dispatcher thread delivers queued
+    # events in batches outside the store lock, so a slow session never holds up
+    # order writes and a bulk change reaches each session as one batch.
+    _shared: Optional['OrderEventBus'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, store: OrderStore):
+        self._subscribers: List[Callable] = []
+        self._pending: deque = deque()
+        self._wakeup = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        store.subscribe(self.on_event)
+
+    @classmethod
+    def shared(cls) -> 'OrderEventBus':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(OrderStore.shared())
+            return cls._shared
+
+    def subscribe(self, handler: Callable):
+        # Handlers are called as handler([(event, order dict, previous), ...])
+        with self._wakeup:
+            if handler not in self._subscribers:
+                self._subscribers.append(handler)
+
+    def unsubscribe(self, handler: Callable):
+        with self._wakeup:
+            if handler in self._subscribers:
+                self._subscribers.remove(handler)
+
+    def on_event(self, event: str, request: FoodRequest, previous: Optional[Dict]):
+        with self._wakeup:
+            if not self._subscribers:
+                return
+            self._pending.append((event, request.to_dict(), previous))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="order-events", daemon=True)
+                self._dispatcher.start()
+            self._wakeup.notify()
+
+    def _dispatch(self):
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                events = list(self._pending)
+                self._pending.clear()
+                handlers = list(self._subscribers)
+            for handler in handlers:
+                try:
+                    handler(events)
+                except Exception:
+                    # One failing session must not stop delivery to the others. It
+                    # stays subscribed: sessions unsubscribe when they disconnect.
+                    logger.exception("order event handler failed")
+
 
 # ======================
 # VIEW COMPONENTS
 # ======================
+class UpdateScheduler:
+    # Coalesces one session's page updates: request() marks controls dirty and the
+    # first request in a frame arms a timer that sends everything dirty in one
+    # page.update(). flush() sends straight away, for when the user must see a
+    # state before something slow starts.
+    def __init__(self, page: ft.Page, frame_seconds: float = UPDATE_FRAME_SECONDS):
+        self.page = page
+        self.frame_seconds = frame_seconds
+        self._lock = threading.Lock()
+        self._dirty: Dict[int, ft.Control] = {}
+        self._whole_page = False
+        self._timer: Optional[threading.Timer] = None
+        self.requested = 0
+        self.flushed = 0
+
+    def request(self, *controls: ft.Control):
+        # No controls means the whole page
+        with self._lock:
+            self.requested += 1
+            if controls:
+                for control in controls:
+                    self._dirty[id(control)] = control
+            else:
+                self._whole_page = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.frame_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @timed("ui.flush")
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._whole_page and not self._dirty:
+                return
+            controls = [] if self._whole_page else list(self._dirty.values())
+            self._dirty = {}
+            self._whole_page = False
+            self.flushed += 1
+        self.page.update(*controls)
+
+    def counters(self) -> Dict:
+        return {"requested": self.requested, "flushed": self.flushed, "merged": self.requested - self.flushed}
+
+
 class ConfettiAnimation:
-    def __init__(self):
-        self.stack = ft.Stack()
+    # A fixed pool of particles, split in two halves that take turns: a burst
+    # makes one half visible and sends it falling while the other half, now
+    # invisible, moves back to the top for the next burst. Both happen in the
+    # same single update, and no controls are created after __init__.
+    def __init__(self, page: ft.Page, updates: Optional[UpdateScheduler] = None,
+                 particles: int = CONFETTI_PARTICLES, reduced_motion: bool = REDUCED_MOTION):
+        self.page = page
+        self.updates = updates or UpdateScheduler(page)
+        self.reduced_motion = reduced_motion
         self.colors = [COLORS["primary"], COLORS["secondary"], COLORS["accent"], COLORS["success"]]
-    
-    def create(self, page: ft.Page):
-        self.stack.controls.clear()
-        for _ in range(50):
-            self.stack.controls.append(
-                ft.Container(
-                    width=10,
-                    height=10,
-                    bgcolor=random.choice(self.colors),
-                    left=random.randint(0, page.width),
-                    top=random.randint(0, 100),
-                    animate_position=ft.animation.Animation(1000, ft.AnimationCurve.EASE_OUT)
-                )
+        # (particle, share of the page width, start height), decided once
+        self.pools: List[List[tuple]] = [[], []]
+        self.stack = ft.Stack()
+        self._next_pool = 0
+        if reduced_motion:
+            return
+        for i in range(particles):
+            start_top = random.randint(0, 100)
+            particle = ft.Container(
+                width=10,
+                height=10,
+                bgcolor=self.colors[i % len(self.colors)],
+                top=start_top,
+                opacity=0,
+                animate_position=ft.animation.Animation(1000, ft.AnimationCurve.EASE_OUT)
             )
-        page.update()
-        for c in self.stack.controls:
-            c.top = page.height
-            c.opacity = 0
-        page.update()
-    
-    def get_widget(self) -> ft.Stack:
-        return self.stack
+            self.stack.controls.append(particle)
+            self.pools[i % 2].append((particle, random.random(), start_top))
+        self.overlay = ft.TransparentPointer(content=self.stack)
+        page.overlay.append(self.overlay)
+
+    def create(self):
+        if self.reduced_motion:
+            return
+        width = self.page.width or 800
+        height = self.page.height or 600
+        falling = self.pools[self._next_pool]
+        resetting = self.pools[1 - self._next_pool]
+        self._next_pool = 1 - self._next_pool
+        for particle, share, start_top in falling:
+            particle.left = int(share * width)
+            particle.opacity = 1
+            particle.top = height
+        for particle, share, start_top in resetting:
+            particle.opacity = 0
+            particle.top = start_top
+        self.updates.request(self.stack)
 
 class OrderForm:
     def __init__(self, on_submit):
@@ -173,10 +2281,7 @@ class OrderForm:
         self.food_type = ft.Dropdown(
             label="Food Type",
             width=300,
-            options=[ft.dropdown.Option(
-                key=item,
-                text=f"{item} (TZS {details['price']:,})"
-            ) for item, details in MENU_ITEMS.items()],
+            options=[ft.dropdown.Option(key=key, text=text) for key, text in MenuCatalog.current().option_specs],
             border_color=COLORS["primary"],
             focused_border_color=COLORS["secondary"]
         )
@@ -222,10 +2327,127 @@ class OrderForm:
 # ======================
 # AI ASSISTANT
 # ======================
+class IntentMatcher:
+    # Keyword phrases per intent, highest priority first. When a question hits
+    # several intents the earliest one wins, matching the old if/elif order.
+    INTENTS = [
+        ("status", ["status", "track", "tracking", "where is my"]),
+        ("menu", ["menu", "menyu"]),
+        ("ingredients", ["ingredients", "viungo"]),
+        ("recommend", ["pendekeza", "shauri"]),
+        ("delivery", ["delivery", "muda", "itachukua muda gani"]),
+        ("greeting", ["hello", "hi", "hey", "habari", "jambo"]),
+        ("help", ["help", "msaada", "saidia"]),
+        ("thanks", ["thank", "thanks", "asante", "shukrani"]),
+    ]
+
+    def __init__(self, intents: Optional[List[tuple]] = None, dishes: Optional[Iterable[str]] = None):
+        intents = intents if intents is not None else self.INTENTS
+        self.priority = {intent: rank for rank, (intent, _) in enumerate(intents)}
+        # Both tries are keyed token by token; a node's None key holds the
+        # intent or dish that ends there.
+        self._phrases: Dict = {}
+        for intent, phrases in intents:
+            for phrase in phrases:
+                self._insert(self._phrases, phrase, intent)
+        self._dishes: Dict = {}
+        for dish in (dishes if dishes is not None else MenuCatalog.current().dishes):
+            self._insert(self._dishes, dish, dish)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
+
+    def _insert(self, trie: Dict, phrase: str, value: str):
+        node = trie
+        for token in self.tokenize(phrase):
+            node = node.setdefault(token, {})
+        node.setdefault(None, value)
+
+    @staticmethod
+    def _walk(trie: Dict, tokens: List[str], start: int) -> List[str]:
+        found = []
+        node = trie
+        for token in itertools.islice(tokens, start, None):
+            node = node.get(token)
+            if node is None:
+                break
+            if None in node:
+                found.append(node[None])
+        return found
+
+    def match(self, text: str) -> tuple:
+        # Returns (intent or None, dishes mentioned in order of appearance)
+        tokens = self.tokenize(text)
+        intent = None
+        dishes: List[str] = []
+        for i in range(len(tokens)):
+            for candidate in self._walk(self._phrases, tokens, i):
+                if intent is None or self.priority[candidate] < self.priority[intent]:
+                    intent = candidate
+            for dish in self._walk(self._dishes, tokens, i):
+                if dish not in dishes:
+                    dishes.append(dish)
+        return intent, dishes
+
+
+class ResponseCache:
+    # Memoizes replies that depend only on the menu; a new MenuCatalog version
+    # means the next lookup starts from an empty cache.
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, str] = {}
+        self._version: Optional[int] = None
+
+    def get(self, key: tuple) -> Optional[str]:
+        version = MenuCatalog.current().version
+        if self._version != version:
+            self._entries = {}
+            self._version = version
+        return self._entries.get(key)
+
+    def put(self, key: tuple, response: str) -> str:
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = response
+        return response
+
+
 class ErickAI:
-    def __init__(self, page: ft.Page, requests: List[FoodRequest]):
+    # Built on first use and again whenever the menu version changes
+    matcher: Optional[IntentMatcher] = None
+    matcher_version: Optional[int] = None
+    response_cache = ResponseCache()
+    RESPONSES = {
+        "greeting": [
+            "Habari! Mimi ni Erick AI, msaidizi wako wa chakula. Nisaidie nini?",
+            "Hujambo! Tuko tayari kukuhudumia."
+        ],
+        "help": "Naweza:\n- Kuchukua maagizo\n- Kufafanua vyakula\n- Kutoa maelezo ya viungo\n- Kufuatilia agizo lako\n- Kujibu maswali yoyote kuhusu chakula",
+        "thanks": [
+            "Karibu! Furahia chakula chako!",
+            "Nimefurahi kukusaidia! 😊",
+            "Ni raha yangu! Nipigie simu kama unahitaji msaada zaidi."
+        ],
+        "default": "Niko hapa kukusaidia kuhusu vyakula vyote! Unaweza kuuliza kuhusu:\n" +
+                  "- Vyakula kwenye menyu\n- Viungo\n- Hali ya agizo\n- Uwasilishaji\n- Mapendekezo"
+    }
+
+    def __init__(self, page: ft.Page, store: OrderStore, show_typing: bool = True,
+                 max_rendered: int = MAX_RENDERED_MESSAGES, kitchen: Optional['KitchenScheduler'] = None,
+                 updates: Optional[UpdateScheduler] = None):
         self.page = page
-        self.requests = requests
+        self.updates = updates or UpdateScheduler(page)
+        self.store = store
+        self.kitchen = kitchen
+        self.show_typing = show_typing
+        self.max_rendered = max_rendered
+        self.rendered: deque = deque()
+        self.archive: deque = deque(maxlen=MAX_ARCHIVED_MESSAGES)
+        self.typing_indicator = ft.Row([
+            ft.ProgressRing(width=16, height=16, stroke_width=2, color=COLORS["primary"]),
+            ft.Text("Erick AI anaandika...", italic=True, size=12)
+        ])
         self.conversation = ft.ListView(expand=True, spacing=10, auto_scroll=True)
         self.user_input = ft.TextField(
             label="Ask Erick AI anything about food...",
@@ -270,106 +2492,209 @@ class ErickAI:
             ft.Row([self.user_input, self.send_button])
         ])
 
-    def add_message(self, sender: str, message: str, is_ai: bool = False):
-        self.conversation.controls.append(
-            ft.Container(
-                content=ft.Column([
-                    ft.Text(sender, weight=ft.FontWeight.BOLD, 
-                           color=COLORS["primary"] if is_ai else COLORS["secondary"]),
-                    ft.Text(message)
-                ]),
-                padding=10,
-                bgcolor=f"{COLORS['primary']}10" if is_ai else f"{COLORS['secondary']}10",
-                border_radius=10,
-                margin=5
-            )
+    def add_message(self, sender: str, message: str, is_ai: bool = False, update: bool = True) -> ft.Text:
+        body = ft.Text(message)
+        container = ft.Container(
+            content=ft.Column([
+                ft.Text(sender, weight=ft.FontWeight.BOLD, 
+                       color=COLORS["primary"] if is_ai else COLORS["secondary"]),
+                body
+            ]),
+            padding=10,
+            bgcolor=f"{COLORS['primary']}10" if is_ai else f"{COLORS['secondary']}10",
+            border_radius=10,
+            margin=5
         )
-        self.page.update()
+        self.conversation.controls.insert(len(self.conversation.controls) - self._typing_shown(), container)
+        self.rendered.append((container, sender, body, is_ai))
+        # Only the newest turns stay in the control tree; older ones move to the archive
+        while len(self.rendered) > self.max_rendered:
+            old_container, old_sender, old_body, old_is_ai = self.rendered.popleft()
+            self.conversation.controls.remove(old_container)
+            self.archive.append((old_sender, old_body.value, old_is_ai))
+        if update:
+            self.updates.request(self.conversation)
+        return body
 
     async def process_input(self, e):
         user_text = self.user_input.value.strip()
         if not user_text:
             return
-            
-        self.add_message("You", user_text)
+
+        self.add_message("You", user_text, update=False)
         self.user_input.value = ""
-        self.page.update()
-        
-        await asyncio.sleep(0.5)  # Simulate thinking
-        
-        response = self.generate_response(user_text.lower())
-        self.add_message("Erick AI", response, is_ai=True)
+        if self.show_typing and self.typing_indicator not in self.conversation.controls:
+            self.conversation.controls.append(self.typing_indicator)
+        # The question and typing indicator go out before the answer is worked on
+        self.updates.request(self.conversation, self.user_input)
+        self.updates.flush()
+
+        await self.respond(user_text.lower())
+
+    async def respond(self, text: str):
+        # Each chunk is produced on a worker thread, so a slow handler never blocks
+        # the event loop, and the reply grows in place as chunks arrive.
+        loop = asyncio.get_running_loop()
+        chunks = self.stream_response(text)
+        body = None
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                if body is None:
+                    self._hide_typing()
+                    body = self.add_message("Erick AI", "", is_ai=True, update=False)
+                body.value += chunk
+                self.updates.request(self.conversation)
+        finally:
+            if body is None:
+                self._hide_typing()
+                self.updates.request(self.conversation)
+
+    def _typing_shown(self) -> int:
+        return int(bool(self.conversation.controls) and self.conversation.controls[-1] is self.typing_indicator)
 
+    def _hide_typing(self):
+        if self.typing_indicator in self.conversation.controls:
+            self.conversation.controls.remove(self.typing_indicator)
+
+    def stream_response(self, text: str) -> Iterator[str]:
+        # Handlers that build long answers can yield as they go; the canned ones
+        # are split by line so the UI paints the first line straight away.
+        yield from self.generate_response(text).splitlines(keepends=True)
+
+    @classmethod
+    def current_matcher(cls) -> IntentMatcher:
+        # Dish names come from the menu, so a new menu version needs a new trie
+        catalog = MenuCatalog.current()
+        if cls.matcher_version != catalog.version:
+            cls.matcher = IntentMatcher(dishes=catalog.dishes)
+            cls.matcher_version = catalog.version
+        return cls.matcher
+
+    @timed("ai.generate_response")
     def generate_response(self, text: str) -> str:
+        MenuCatalog.reload()
+        intent, dishes = self.current_matcher().match(text)
+
         # Check order status
-        if any(w in text for w in ["status", "track", "where is my"]):
+        if intent == "status":
             return self.handle_order_status(text)
-        
+
+        # Recommendations follow the order history, so they are never cached
+        elif intent == "recommend":
+            return self.handle_recommend(text)
+
+        # Delivery questions, answered from the live kitchen queue when there is one
+        elif intent == "delivery" and self.kitchen is not None:
+            return self.handle_delivery(text)
+
+        # Standard responses
+        elif intent in ("greeting", "thanks"):
+            return random.choice(self.RESPONSES[intent])
+
+        # Everything else depends only on the menu, so it is built once per menu version
+        key = (intent, tuple(dishes) if intent == "ingredients" else ())
+        response = self.response_cache.get(key)
+        if response is None:
+            response = self.response_cache.put(key, self.canned_response(intent, dishes))
+        return response
+
+    def canned_response(self, intent: Optional[str], dishes: List[str]) -> str:
         # Menu inquiry
-        elif "menu" in text:
+        if intent == "menu":
+            catalog = MenuCatalog.current()
             menu_text = "Menu yetu:\n"
-            for item, details in MENU_ITEMS.items():
-                menu_text += f"🍽️ {item}: TZS {details['price']:,}\n"
-                menu_text += f"   {details['description']}\n"
+            for item in catalog.dishes:
+                menu_text += f"🍽️ {item}: {catalog.price_texts[item]}\n"
+                menu_text += f"   {catalog.items[item]['description']}\n"
             return menu_text + "\nUngependa kuagiza nini?"
-        
+
         # Nutrition info
-        elif any(w in text for w in ["ingredients", "viungo"]):
-            items = [item for item in MENU_ITEMS if item.lower() in text]
-            if items:
+        elif intent == "ingredients":
+            if dishes:
+                catalog = MenuCatalog.current()
                 response = ""
-                for item in items:
-                    details = MENU_ITEMS[item]
+                for item in dishes:
                     response += f"{item}:\n"
-                    response += f"• Viungo: {', '.join(details['ingredients'])}\n"
-                    response += f"• Bei: TZS {details['price']:,}\n\n"
+                    response += f"• Viungo: {', '.join(catalog.items[item]['ingredients'])}\n"
+                    response += f"• Bei: {catalog.price_texts[item]}\n\n"
                 return response
             else:
                 return "Samahani, sielewi chakula gani unahusu. Tafadhali niambie jina kamili."
-        
-        # Food recommendations
-        elif any(w in text for w in ["pendekeza", "shauri"]):
-            popular = max(MENU_ITEMS.items(), key=lambda x: x[1]['price'])
-            return f"Napendekeza {popular[0]} - ni maarufu sana! {popular[1]['description']}"
-        
+
         # Delivery questions
-        elif any(w in text for w in ["delivery", "muda", "itachukua muda gani"]):
+        elif intent == "delivery":
             return "Uwasilishaji huchukua dakika 30-45. Tunatengeneza chakula chako mara baada ya kuagizwa!"
-        
-        # Standard responses
-        responses = {
-            "greeting": [
-                "Habari! Mimi ni Erick AI, msaidizi wako wa chakula. Nisaidie nini?",
-                "Hujambo! Tuko tayari kukuhudumia."
-            ],
-            "help": "Naweza:\n- Kuchukua maagizo\n- Kufafanua vyakula\n- Kutoa maelezo ya viungo\n- Kufuatilia agizo lako\n- Kujibu maswali yoyote kuhusu chakula",
-            "thanks": [
-                "Karibu! Furahia chakula chako!",
-                "Nimefurahi kukusaidia! 😊",
-                "Ni raha yangu! Nipigie simu kama unahitaji msaada zaidi."
-            ],
-            "default": "Niko hapa kukusaidia kuhusu vyakula vyote! Unaweza kuuliza kuhusu:\n" +
-                      "- Vyakula kwenye menyu\n- Viungo\n- Hali ya agizo\n- Uwasilishaji\n- Mapendekezo"
-        }
-        
-        if any(w in text for w in ["hello", "hi", "hey", "habari", "jambo"]):
-            return random.choice(responses["greeting"])
-        elif any(w in text for w in ["help", "msaada", "saidia"]):
-            return responses["help"]
-        elif any(w in text for w in ["thank", "thanks", "asante", "shukrani"]):
-            return random.choice(responses["thanks"])
-        
-        return responses["default"]
+
+        elif intent == "help":
+            return self.RESPONSES["help"]
+
+        return self.RESPONSES["default"]
 
     def handle_order_status(self, text: str) -> str:
-        for request in self.requests:
-            if request.user_name.lower() in text.lower() or request.order_id in text:
-                return (f"Agizo {request.order_id}:\n"
+        order_id = ORDER_ID_PATTERN.search(text)
+        if order_id:
+            request = self.store.find(order_id.group(0).upper())
+            if request:
+                return self.describe_order(request)
+        name = self.find_customer(text)
+        if name is None:
+            return "Sikupata agizo lako. Tafadhali hakikisha jina au namba ya agizo."
+        active = self.store.customers.active_for(name)
+        if len(active) > 1:
+            return f"Una maagizo {len(active)} yanayoendelea:\n\n" + "\n\n".join(
+                self.describe_order(r) for r in reversed(active))
+        latest = active[0] if active else self.store.customers.latest_for(name) or self.store.archive.latest_for(name)
+        return self.describe_order(latest)
+
+    def find_customer(self, text: str) -> Optional[str]:
+        # Names can span several words: try every run of up to MAX_NAME_WORDS
+        # words against the store's customer index, preferring the longest.
+        words = IntentMatcher.tokenize(text)
+        for n in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                candidate = " ".join(words[i:i + n])
+                if candidate in self.store.customers or candidate in self.store.archive:
+                    return candidate
+        return None
+
+    def describe_order(self, request: FoodRequest) -> str:
+        description = (f"Agizo {request.order_id}:\n"
                        f"🍽️ {request.food_type} (x{request.quantity})\n"
                        f"💰 Jumla: TZS{request.price:,}\n"
                        f"📦 Hali: {request.delivery_status}\n"
                        f"⏱️ Imeagizwa: {request.timestamp}")
-        return "Sikupata agizo lako. Tafadhali hakikisha jina au namba ya agizo."
+        minutes = self.kitchen.eta_minutes(request.order_id) if self.kitchen else None
+        if minutes is not None:
+            description += f"\n⏳ Litakufikia baada ya takriban dakika {minutes}"
+        return description
+
+    def handle_recommend(self, text: str) -> str:
+        catalog = MenuCatalog.current()
+        reasons = {
+            "favorite": "unakipenda, mara nyingi unakiagiza",
+            "together": "huagizwa pamoja na {}",
+            "time": "wateja wengi hukiagiza wakati wa {}",
+            "popular": "ni maarufu sana kwa wateja wetu",
+        }
+        lines = []
+        for dish, reason, context in self.store.recommender.recommend(self.find_customer(text)):
+            why = reasons[reason].format(context) if reason in reasons else catalog.items[dish]["description"]
+            lines.append(f"🍽️ {dish} ({catalog.price_texts[dish]}) - {why}")
+        return "Napendekeza:\n" + "\n".join(lines) + "\n\nUngependa kuagiza nini?"
+
+    def handle_delivery(self, text: str) -> str:
+        name = self.find_customer(text)
+        for request in reversed(self.store.customers.active_for(name) if name else []):
+            minutes = self.kitchen.eta_minutes(request.order_id)
+            if minutes is not None:
+                return f"Agizo lako {request.order_id} ({request.food_type}) litakufikia baada ya takriban dakika {minutes}."
+            if request.delivery_status == "On the way":
+                return f"Agizo lako {request.order_id} ({request.food_type}) liko njiani!"
+        minutes = self.kitchen.estimate_new_order_minutes()
+        return f"Kwa sasa uwasilishaji huchukua takriban dakika {minutes}. Tunatengeneza chakula chako mara baada ya kuagizwa!"
 
     def show_ai_capabilities(self, e):
         capabilities = [
@@ -387,8 +2712,30 @@ class ErickAI:
 # MAIN APPLICATION
 # ======================
 def main(page: ft.Page):
-    requests = DataManager.load_requests()
-    confetti = ConfettiAnimation()
+    store = OrderStore.shared()
+    service = OrderService(store)
+    kitchen = KitchenScheduler.shared()
+    kitchen.start(page)
+    store.archive.start(service)
+    metrics = Metrics.shared()
+    metrics.gauge("orders", store.__len__)
+    metrics.gauge("stage_minutes", store.analytics.stage_minutes)
+    metrics.start()
+    bus = OrderEventBus.shared()
+    updates = UpdateScheduler(page)
+    confetti = ConfettiAnimation(page, updates)
+    # Orders placed from this session, for status notifications
+    placed_ids = set()
+    # Bus handlers this session registered, by role, so a rebuilt view replaces
+    # its old handler and a closed session drops all of them
+    session_handlers: Dict[str, Callable] = {}
+    # route -> (View, menu version it was built with). Built views keep their
+    # state across navigation; a view registers a hook in view_hooks to catch up
+    # on changes it missed while hidden.
+    view_cache: Dict[str, tuple] = {}
+    view_hooks: Dict[str, Callable] = {}
+    admin_logged_in = False
+    assistant: Optional[ErickAI] = None
     
     page.title = "Mama Ntilie Food Delivery"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -400,13 +2747,43 @@ def main(page: ft.Page):
     def toggle_theme(e):
         page.theme_mode = ft.ThemeMode.DARK if page.theme_mode == ft.ThemeMode.LIGHT else ft.ThemeMode.LIGHT
         page.bgcolor = COLORS["dark_bg"] if page.theme_mode == ft.ThemeMode.DARK else COLORS["background"]
-        page.update()
+        # Views bake the theme colours in when they are built
+        invalidate_views()
+        route_change(None)
+
+    def listen(role: str, handler: Optional[Callable]):
+        previous = session_handlers.pop(role, None)
+        if previous is not None:
+            bus.unsubscribe(previous)
+        if handler is not None:
+            session_handlers[role] = handler
+            bus.subscribe(handler)
+
+    def close_session(e):
+        for handler in session_handlers.values():
+            bus.unsubscribe(handler)
+        session_handlers.clear()
+
+    def notify_customer(events):
+        messages = []
+        for event, order, previous in events:
+            if order["order_id"] not in placed_ids:
+                continue
+            if event == "deleted":
+                messages.append(f"Agizo {order['order_id']} limeghairiwa")
+            elif previous and previous.get("delivery_status", order["delivery_status"]) != order["delivery_status"]:
+                messages.append(f"Agizo {order['order_id']} ({order['food_type']}): {order['delivery_status']}")
+        if not messages:
+            return
+        page.snack_bar = ft.SnackBar(ft.Text("\n".join(messages[-3:])), bgcolor=COLORS["secondary"])
+        page.snack_bar.open = True
+        updates.request()
 
     def text_color():
         return COLORS["dark_text"] if page.theme_mode == ft.ThemeMode.DARK else COLORS["text"]
 
     def get_food_icon(food_type: str) -> str:
-        return MENU_ITEMS.get(food_type, {}).get("icon", "RESTAURANT")
+        return MenuCatalog.current().icon_for(food_type)
 
     def build_header(title: str) -> ft.Row:
         return ft.Row([
@@ -425,28 +2802,19 @@ def main(page: ft.Page):
 
     def user_view() -> ft.Container:
         def submit_order(e):
-            if not order_form.user_name.value or not order_form.food_type.value:
-                order_form.status_text.value = "Tafadhali jaza sehemu zinazohitajika"
-                order_form.status_text.color = COLORS["error"]
-                page.update()
-                return
             try:
-                quantity = int(order_form.quantity.value)
-                if quantity <= 0:
-                    raise ValueError
-            except ValueError:
-                order_form.status_text.value = "Tafadhali weka idadi sahihi"
+                new_request = service.place_order(
+                    order_form.user_name.value,
+                    order_form.food_type.value,
+                    order_form.quantity.value,
+                    order_form.special_requests.value
+                )
+            except OrderValidationError as error:
+                order_form.status_text.value = str(error)
                 order_form.status_text.color = COLORS["error"]
-                page.update()
+                updates.request(order_form.status_text)
                 return
-            new_request = FoodRequest(
-                order_form.user_name.value,
-                order_form.food_type.value,
-                quantity,
-                order_form.special_requests.value
-            )
-            requests.append(new_request)
-            DataManager.save_requests(requests)
+            placed_ids.add(new_request.order_id)
             order_form.status_text.value = f"Agizo limewasilishwa! Namba ya agizo: {new_request.order_id}\nJumla: TZS {new_request.price:,}"
             order_form.status_text.color = COLORS["success"]
             order_form.user_name.value = ""
@@ -454,9 +2822,12 @@ def main(page: ft.Page):
             order_form.quantity.value = "1"
             order_form.special_requests.value = ""
             order_form.submit_btn.bgcolor = COLORS["success"]
-            page.update()
+            updates.request()
+            threading.Timer(SUBMIT_FLASH_SECONDS, end_flash).start()
+
+        def end_flash():
             order_form.submit_btn.bgcolor = COLORS["primary"]
-            page.update()
+            updates.request(order_form.submit_btn)
 
         order_form = OrderForm(on_submit=submit_order)
         return ft.Container(
@@ -521,8 +2892,44 @@ def main(page: ft.Page):
             height=50
         )
         status_text = ft.Text("", color=COLORS["error"])
-        requests_view = ft.Column(scroll=ft.ScrollMode.AUTO)
+        # ListView only lays out the cards in its viewport, and we only build the
+        # cards for the current page of orders.
+        requests_view = ft.ListView(height=600, spacing=10, width=470)
         stats_view = ft.Column()
+        current_page = 0
+        rendered_revision = -1
+        page_label = ft.Text("", color=text_color())
+        prev_btn = ft.IconButton(icon="CHEVRON_LEFT", on_click=lambda e: change_page(-1))
+        next_btn = ft.IconButton(icon="CHEVRON_RIGHT", on_click=lambda e: change_page(1))
+        pager = ft.Row([prev_btn, page_label, next_btn], alignment=ft.MainAxisAlignment.CENTER)
+        selected_ids = set()
+        bulk_from = ft.Dropdown(label="Kutoka", options=[ft.dropdown.Option(s) for s in DELIVERY_STATUSES], width=150)
+        bulk_to = ft.Dropdown(label="Kwenda", options=[ft.dropdown.Option(s) for s in DELIVERY_STATUSES], width=150)
+        bulk_selected_btn = ft.ElevatedButton("Badilisha zilizochaguliwa (0)", on_click=lambda e: bulk_change_selected())
+        # The import file is on the cashier's machine, not the server
+        import_picker = ft.FilePicker(on_result=lambda e: import_picked(e), on_upload=lambda e: import_uploaded(e))
+        page.overlay.append(import_picker)
+        pending_uploads: Dict[str, str] = {}
+        bulk_result = ft.Text("", color=COLORS["success"])
+        bulk_view = ft.Column([
+            ft.Row([
+                bulk_from,
+                bulk_to,
+                ft.ElevatedButton("Badilisha zote", on_click=lambda e: bulk_advance())
+            ], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row([bulk_selected_btn], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row([
+                ft.ElevatedButton(
+                    "Ingiza maagizo (CSV / JSONL)",
+                    icon="UPLOAD_FILE",
+                    on_click=lambda e: import_picker.pick_files(
+                        dialog_title="Chagua faili la maagizo",
+                        allowed_extensions=["csv", "jsonl", "ndjson"]
+                    )
+                )
+            ], alignment=ft.MainAxisAlignment.CENTER),
+            bulk_result
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
 
                 # Background image from phot.pyw
         bg_image = ft.Image(
@@ -534,170 +2941,337 @@ def main(page: ft.Page):
             repeat=ft.ImageRepeat.NO_REPEAT
         )
         def calculate_stats():
-            total_orders = len(requests)
-            completed_orders = sum(1 for r in requests if r.completed)
-            total_revenue = sum(r.price for r in requests)
-            popular_items = {}
-            for r in requests:
-                if r.food_type in popular_items:
-                    popular_items[r.food_type] += r.quantity
-                else:
-                    popular_items[r.food_type] = r.quantity
-            most_popular = max(popular_items.items(), key=lambda x: x[1], default=("Hakuna", 0))
-            return {
-                "total_orders": total_orders,
-                "completed_orders": completed_orders,
-                "total_revenue": total_revenue,
-                "most_popular": most_popular
-            }
-        def refresh_requests():
-            nonlocal requests
-            requests = DataManager.load_requests()
-            requests_view.controls.clear()
-            stats_view.controls.clear()
+            return service.stats()
+        def stat_tile(label: str, value_size: int = 24):
+            value = ft.Text("", size=value_size, weight=ft.FontWeight.BOLD)
+            tile = ft.Card(
+                ft.Container(
+                    ft.Column([
+                        ft.Text(label, size=14),
+                        value
+                    ], alignment=ft.MainAxisAlignment.CENTER),
+                    padding=20,
+                    width=150
+                ),
+                elevation=5
+            )
+            return tile, value
+        total_tile, total_value = stat_tile("Jumla ya Maagizo")
+        completed_tile, completed_value = stat_tile("Maagizo Kamili")
+        revenue_tile, revenue_value = stat_tile("Mapato")
+        popular_tile, popular_value = stat_tile("Kipendwa Zaidi", value_size=16)
+        stats_view.controls.append(ft.Row([total_tile, completed_tile, revenue_tile, popular_tile], spacing=20))
+        report_text = ft.Text("", color=text_color())
+        stats_view.controls.append(ft.Row([
+            ft.ElevatedButton(f"Ripoti ya Siku {REPORT_DAYS}", icon="INSIGHTS", on_click=lambda e: show_report()),
+            report_text
+        ], spacing=20))
+        # order_id -> the controls of its rendered card, so a single-order change
+        # patches that card in place instead of rebuilding the whole list.
+        order_cards: Dict[str, Dict] = {}
+        # Bus pushes arrive on the dispatcher thread while this session's own
+        # callbacks run on Flet's workers; both change order_cards and the list.
+        cards_lock = threading.RLock()
+        def refresh_stats():
             stats = calculate_stats()
-            stats_view.controls.append(
-                ft.Row([
-                    ft.Card(
-                        ft.Container(
-                            ft.Column([
-                                ft.Text("Jumla ya Maagizo", size=14),
-                                ft.Text(str(stats["total_orders"]), size=24, weight=ft.FontWeight.BOLD)
-                            ], alignment=ft.MainAxisAlignment.CENTER),
-                            padding=20,
-                            width=150
-                        ),
-                        elevation=5
-                    ),
-                    ft.Card(
-                        ft.Container(
-                            ft.Column([
-                                ft.Text("Maagizo Kamili", size=14),
-                                ft.Text(str(stats["completed_orders"]), size=24, weight=ft.FontWeight.BOLD)
-                            ], alignment=ft.MainAxisAlignment.CENTER),
-                            padding=20,
-                            width=150
-                        ),
-                        elevation=5
-                    ),
-                    ft.Card(
-                        ft.Container(
-                            ft.Column([
-                                ft.Text("Mapato", size=14),
-                                ft.Text(f"TZS{stats['total_revenue']:,}", size=24, weight=ft.FontWeight.BOLD)
-                            ], alignment=ft.MainAxisAlignment.CENTER),
-                            padding=20,
-                            width=150
+            total_value.value = str(stats["total_orders"])
+            completed_value.value = str(stats["completed_orders"])
+            revenue_value.value = f"TZS{stats['total_revenue']:,}"
+            popular_value.value = f"{stats['most_popular'][0]} (x{stats['most_popular'][1]})"
+        def show_report():
+            report = service.sales_report()
+            path = service.export_sales_report()
+            best = ", ".join(f"{dish} (x{qty})" for dish, qty in report["dishes"][:3]) or "Hakuna"
+            stages = ", ".join(f"{status}: dk {minutes}" for status, minutes in report["stage_minutes"].items()) or "Bado hakuna"
+            report_text.value = (
+                f"Siku {REPORT_DAYS} zilizopita: maagizo {report['orders']:,}, mapato TZS{report['revenue']:,}\n"
+                f"Vinavyouzwa zaidi: {best}\n"
+                f"Muda wa kila hatua: {stages}\n"
+                f"Ripoti (CSV): {os.path.abspath(path)}"
+            )
+            updates.request(report_text)
+        def refresh_pager():
+            nonlocal current_page
+            total_pages = max(1, -(-service.count() // ADMIN_PAGE_SIZE))
+            current_page = min(max(current_page, 0), total_pages - 1)
+            page_label.value = f"Ukurasa {current_page + 1} / {total_pages}"
+            prev_btn.disabled = current_page == 0
+            next_btn.disabled = current_page >= total_pages - 1
+            pager.visible = requests_view.visible and total_pages > 1
+        def change_page(delta):
+            nonlocal current_page
+            current_page += delta
+            refresh_requests()
+            updates.request()
+        def style_card(entry: Dict, request: FoodRequest):
+            entry["subtitle"].value = (
+                f"Mteja: {request.user_name}\n"
+                f"Chakula: {request.food_type} (x{request.quantity})\n"
+                f"Jumla: TZS {request.price:,}\n"
+                f"Hali: {request.delivery_status}\n"
+                f"Maagizo maalum: {request.special_requests or 'Hakuna'}"
+            )
+            entry["dropdown"].value = request.delivery_status
+            complete_btn = entry["complete_btn"]
+            complete_btn.text = "Kamilisha" if not request.completed else "Imekamilika"
+            complete_btn.disabled = request.completed
+            complete_btn.bgcolor = COLORS["success"] if request.completed else None
+            complete_btn.color = COLORS["white"] if request.completed else None
+            expedite_btn = entry["expedite_btn"]
+            expedite_btn.visible = not request.completed and request.delivery_status == "Preparing"
+            expedite_btn.disabled = kitchen.is_expedited(request.order_id)
+            entry["card"].content.border = ft.border.all(2, COLORS["success"]) if request.completed else None
+            entry["version"] = request.version
+        def build_request_card(request: FoodRequest) -> ft.Card:
+            order_id = request.order_id
+            status_dropdown = ft.Dropdown(
+                options=[ft.dropdown.Option(s) for s in DELIVERY_STATUSES],
+                width=150,
+                on_change=lambda e: update_status(order_id, e.control.value)
+            )
+            subtitle = ft.Text("", color=text_color())
+            select_box = ft.Checkbox(
+                value=order_id in selected_ids,
+                on_change=lambda e: toggle_selected(order_id, e.control.value)
+            )
+            complete_btn = ft.ElevatedButton("", on_click=lambda e: toggle_complete(order_id))
+            expedite_btn = ft.IconButton(
+                icon="BOLT",
+                tooltip="Harakisha jikoni",
+                on_click=lambda e: expedite(order_id),
+                icon_color=COLORS["primary"]
+            )
+            request_card = ft.Card(
+                elevation=10,
+                content=ft.Container(
+                    content=ft.Column([
+                        ft.ListTile(
+                            leading=ft.Icon(name=get_food_icon(request.food_type)),
+                            title=ft.Text(f"Agizo {order_id}", weight=ft.FontWeight.BOLD, color=text_color()),
+                            subtitle=subtitle,
+                            trailing=select_box
                         ),
-                        elevation=5
-                    ),
-                    ft.Card(
+                        ft.Row([
+                            complete_btn,
+                            expedite_btn,
+                            ft.IconButton(
+                                icon="DELETE",
+                                on_click=lambda e: delete_request(order_id),
+                                icon_color=COLORS["error"]
+                            ),
+                            status_dropdown
+                        ], alignment=ft.MainAxisAlignment.END)
+                    ]),
+                    width=450,
+                    padding=10,
+                    bgcolor=f"{COLORS['primary']}20" if page.theme_mode == ft.ThemeMode.LIGHT else f"{COLORS['dark_bg']}80",
+                    border_radius=10
+                )
+            )
+            entry = {"card": request_card, "subtitle": subtitle, "complete_btn": complete_btn,
+                     "expedite_btn": expedite_btn, "dropdown": status_dropdown}
+            style_card(entry, request)
+            order_cards[order_id] = entry
+            return request_card
+        def patch_card(order_id: str) -> List[ft.Control]:
+            # Returns the controls that changed, for a targeted update
+            with cards_lock:
+                entry = order_cards.get(order_id)
+                if entry is None:
+                    return []
+                request = service.get(order_id)
+                if request is None:
+                    requests_view.controls.remove(entry["card"])
+                    del order_cards[order_id]
+                    return [requests_view]
+                style_card(entry, request)
+                return [entry["card"]]
+        @timed("admin.refresh_requests")
+        def refresh_requests():
+            nonlocal rendered_revision
+            with cards_lock:
+                rendered_revision = store.revision
+                requests_view.controls.clear()
+                order_cards.clear()
+                refresh_stats()
+                refresh_pager()
+                if not service.count():
+                    requests_view.controls.append(
                         ft.Container(
-                            ft.Column([
-                                ft.Text("Kipendwa Zaidi", size=14),
-                                ft.Text(f"{stats['most_popular'][0]} (x{stats['most_popular'][1]})", 
-                                      size=16, weight=ft.FontWeight.BOLD)
-                            ], alignment=ft.MainAxisAlignment.CENTER),
+                            content=ft.Column([
+                                ft.Icon(name="EMPTY_DASHBOARD", size=50, color=COLORS["primary"]),
+                                ft.Text("Hakuna maagizo bado!", color=text_color())
+                            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
                             padding=20,
-                            width=150
-                        ),
-                        elevation=5
-                    )
-                ], spacing=20)
-            )
-            if not requests:
-                requests_view.controls.append(
-                    ft.Container(
-                        content=ft.Column([
-                            ft.Icon(name="EMPTY_DASHBOARD", size=50, color=COLORS["primary"]),
-                            ft.Text("Hakuna maagizo bado!", color=text_color())
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        padding=20,
-                        alignment=ft.alignment.center
-                    )
-                )
-                return
-            for request in requests:
-                status_dropdown = ft.Dropdown(
-                    options=[ft.dropdown.Option(s) for s in DELIVERY_STATUSES],
-                    value=request.delivery_status,
-                    width=150,
-                    on_change=lambda e, req=request: update_status(req, e.control.value)
-                )
-                request_card = ft.Card(
-                    elevation=10,
-                    content=ft.Container(
-                        content=ft.Column([
-                            ft.ListTile(
-                                leading=ft.Icon(name=get_food_icon(request.food_type)),
-                                title=ft.Text(f"Agizo {request.order_id}", weight=ft.FontWeight.BOLD, color=text_color()),
-                                subtitle=ft.Text(
-                                    f"Mteja: {request.user_name}\n"
-                                    f"Chakula: {request.food_type} (x{request.quantity})\n"
-                                    f"Jumla: TZS {request.price:,}\n"
-                                    f"Hali: {request.delivery_status}\n"
-                                    f"Maagizo maalum: {request.special_requests or 'Hakuna'}",
-                                    color=text_color()
-                                )
-                            ),
-                            ft.Row([
-                                ft.ElevatedButton(
-                                    "Kamilisha" if not request.completed else "Imekamilika",
-                                    on_click=lambda e, req=request: toggle_complete(req),
-                                    disabled=request.completed,
-                                    bgcolor=COLORS["success"] if request.completed else None,
-                                    color=COLORS["white"] if request.completed else None
-                                ),
-                                ft.IconButton(
-                                    icon="DELETE",
-                                    on_click=lambda e, req=request: delete_request(req),
-                                    icon_color=COLORS["error"]
-                                ),
-                                status_dropdown
-                            ], alignment=ft.MainAxisAlignment.END)
-                        ]),
-                        width=450,
-                        padding=10,
-                        bgcolor=f"{COLORS['primary']}20" if page.theme_mode == ft.ThemeMode.LIGHT else f"{COLORS['dark_bg']}80",
-                        border_radius=10
+                            alignment=ft.alignment.center
+                        )
                     )
-                )
-                if request.completed:
-                    request_card.content.border = ft.border.all(2, COLORS["success"])
-                requests_view.controls.append(request_card)
-        def update_status(request, status):
-            request.delivery_status = status
-            DataManager.save_requests(requests)
-            refresh_requests()
-            page.update()
-        def toggle_complete(request):
-            request.completed = not request.completed
-            if request.completed:
-                request.delivery_status = "Delivered"
-                confetti.create(page)
-            DataManager.save_requests(requests)
-            refresh_requests()
-            page.update()
-        def delete_request(request):
-            requests.remove(request)
-            DataManager.save_requests(requests)
+                    return
+                for request in service.list_page(current_page):
+                    requests_view.controls.append(build_request_card(request))
+        def apply_change(order_id: str, change) -> bool:
+            # Cards carry the version they were rendered from; if another session
+            # changed the order since, show the fresh state instead of overwriting it.
+            try:
+                change(order_cards[order_id]["version"])
+            except (StaleOrderError, KeyError):
+                status_text.value = "Agizo hili limebadilishwa na msimamizi mwingine. Tafadhali angalia tena."
+                refresh_requests()
+                updates.request()
+                return False
+            status_text.value = ""
+            changed = patch_card(order_id)
+            refresh_stats()
+            refresh_pager()
+            updates.request(status_text, stats_view, pager, *changed)
+            return True
+        def on_order_events(events):
+            # Changes from other sessions and the kitchen, patched in as they happen
+            nonlocal rendered_revision
+            with cards_lock:
+                rendered_revision = store.revision
+                changed = []
+                for event, order, previous in events:
+                    order_id = order["order_id"]
+                    if order_id in order_cards:
+                        changed.extend(patch_card(order_id))
+                    elif event == "created" and current_page == 0:
+                        # New orders go on top of the first page; its oldest card
+                        # moves on to the next page
+                        request = service.get(order_id)
+                        if request is None:
+                            continue
+                        if not order_cards:
+                            requests_view.controls.clear()
+                        requests_view.controls.insert(0, build_request_card(request))
+                        if len(order_cards) > ADMIN_PAGE_SIZE:
+                            dropped = requests_view.controls.pop()
+                            for key, entry in list(order_cards.items()):
+                                if entry["card"] is dropped:
+                                    del order_cards[key]
+                                    break
+                        changed.append(requests_view)
+                refresh_stats()
+                refresh_pager()
+                updates.request(stats_view, pager, *changed)
+        def update_status(order_id: str, status: str):
+            apply_change(order_id, lambda version: service.update_status(order_id, status, version))
+        def toggle_complete(order_id: str):
+            if apply_change(order_id, lambda version: service.toggle_complete(order_id, version)):
+                request = service.get(order_id)
+                if request and request.completed:
+                    confetti.create()
+        def delete_request(order_id: str):
+            apply_change(order_id, lambda version: service.delete(order_id, version))
+        def expedite(order_id: str):
+            if kitchen.expedite(order_id):
+                status_text.value = ""
+            else:
+                status_text.value = "Agizo hili halisubiri tena jikoni."
+            updates.request(status_text, *patch_card(order_id))
+        def toggle_selected(order_id: str, selected: bool):
+            if selected:
+                selected_ids.add(order_id)
+            else:
+                selected_ids.discard(order_id)
+            bulk_selected_btn.text = f"Badilisha zilizochaguliwa ({len(selected_ids)})"
+            updates.request(bulk_selected_btn)
+        def finish_bulk(message: str):
+            # One refresh and one page update for the whole batch
+            selected_ids.clear()
+            bulk_selected_btn.text = "Badilisha zilizochaguliwa (0)"
+            bulk_result.value = message
             refresh_requests()
-            page.update()
+            updates.request()
+        def bulk_change_selected():
+            if not bulk_to.value or not selected_ids:
+                finish_bulk("Chagua maagizo na hali mpya kwanza")
+                return
+            updated = service.bulk_update_status(list(selected_ids), bulk_to.value)
+            finish_bulk(f"Maagizo {len(updated)} yamebadilishwa kuwa {bulk_to.value}")
+        def bulk_advance():
+            if not bulk_from.value or not bulk_to.value:
+                finish_bulk("Chagua hali ya kutoka na ya kwenda kwanza")
+                return
+            updated = service.advance_all(bulk_from.value, bulk_to.value)
+            finish_bulk(f"Maagizo {len(updated)} yamehamishwa kutoka {bulk_from.value} kwenda {bulk_to.value}")
+        def import_picked(e):
+            # In the browser the picked file is uploaded to UPLOAD_DIR under a
+            # unique name first; the desktop app can read it where it is.
+            if not e.files:
+                return
+            picked = e.files[0]
+            if not page.web and picked.path:
+                import_orders(picked.path)
+                return
+            target = f"{uuid.uuid4().hex}-{os.path.basename(picked.name)}"
+            pending_uploads[picked.name] = target
+            bulk_result.value = f"Inapakia {picked.name}..."
+            updates.request(bulk_result)
+            import_picker.upload([ft.FilePickerUploadFile(name=picked.name, upload_url=page.get_upload_url(target, 600))])
+        def import_uploaded(e):
+            if e.error:
+                pending_uploads.pop(e.file_name, None)
+                finish_bulk(f"Imeshindikana kupakia faili: {e.error}")
+                return
+            if e.progress is None or e.progress < 1:
+                return
+            target = pending_uploads.pop(e.file_name, None)
+            if target is None:
+                return
+            path = os.path.join(UPLOAD_DIR, target)
+            try:
+                import_orders(path)
+            finally:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+        def import_orders(path: str):
+            try:
+                placed, errors = service.import_orders(path)
+            except (OSError, ValueError) as error:
+                finish_bulk(f"Imeshindikana kusoma faili: {error}")
+                return
+            message = f"Maagizo {len(placed)} yameingizwa"
+            if errors:
+                message += f"; mistari {len(errors)} ina makosa (mf. mstari {errors[0][0]}: {errors[0][1]})"
+            finish_bulk(message)
         def login(e):
+            nonlocal admin_logged_in
             if password_field.value != ADMIN_PASSWORD:
                 status_text.value = "Nywila si sahihi"
-                page.update()
+                updates.request(status_text)
                 return
+            admin_logged_in = True
+            show_dashboard()
+            updates.request()
+        def reload_requests(e):
+            refresh_requests()
+            updates.request()
+        def show_dashboard():
             status_text.value = ""
             password_field.visible = False
             login_btn.visible = False
-            refresh_requests()
             requests_view.visible = True
             stats_view.visible = True
-            page.update()
+            bulk_view.visible = True
+            refresh_requests()
+            listen("admin", on_order_events)
+        def resume():
+            # The cached view is back on screen: live updates stopped while it was
+            # hidden, so re-render only if orders changed in the meantime.
+            if not admin_logged_in:
+                return
+            listen("admin", on_order_events)
+            if rendered_revision != store.revision:
+                refresh_requests()
         login_btn.on_click = login
+        view_hooks["/admin"] = resume
         requests_view.visible = False
         stats_view.visible = False
+        pager.visible = False
+        bulk_view.visible = False
+        if admin_logged_in:
+            show_dashboard()
         return ft.Container(
             content=ft.Column([
                 build_header("Dashibodi ya Msimamizi"),
@@ -705,10 +3279,12 @@ def main(page: ft.Page):
                 login_btn,
                 status_text,
                 stats_view,
+                bulk_view,
                 requests_view,
+                pager,
                 ft.ElevatedButton(
                     "Sasisha Maagizo",
-                    on_click=lambda e: refresh_requests(),
+                    on_click=reload_requests,
                     icon="REFRESH",
                     bgcolor=COLORS["secondary"],
                     color=COLORS["white"]
@@ -719,10 +3295,14 @@ def main(page: ft.Page):
         )
 
     def ai_view() -> ft.Container:
+        # One assistant per session, so a rebuilt view keeps the conversation
+        nonlocal assistant
+        if assistant is None:
+            assistant = ErickAI(page, store, kitchen=kitchen, updates=updates)
         return ft.Container(
             content=ft.Column([
                 build_header("Msaidizi wa Erick AI"),
-                ErickAI(page, requests).get_view()
+                assistant.get_view()
             ], spacing=20),
             padding=40,
             width=page.width,
@@ -733,18 +3313,37 @@ def main(page: ft.Page):
             )
         )
 
+    builders = {"/": user_view, "/admin": admin_view, "/ai": ai_view}
+
+    def invalidate_views():
+        view_cache.clear()
+        view_hooks.clear()
+
+    @timed("ui.route_change")
     def route_change(e):
+        MenuCatalog.reload()
+        route = page.route or "/"
+        if route != "/admin":
+            # A hidden admin view doesn't need live updates; resume() catches up
+            listen("admin", None)
         page.views.clear()
-        if page.route == "/" or page.route == "":
-            page.views.append(ft.View("/", [user_view()], padding=0))
-        elif page.route == "/admin":
-            page.views.append(ft.View("/admin", [admin_view()], padding=0))
-        elif page.route == "/ai":
-            page.views.append(ft.View("/ai", [ai_view()], padding=0))
-        page.update()
+        if route in builders:
+            version = MenuCatalog.current().version
+            cached = view_cache.get(route)
+            if cached is None or cached[1] != version:
+                cached = view_cache[route] = (ft.View(route, [builders[route]()], padding=0), version)
+            page.views.append(cached[0])
+            if route in view_hooks:
+                view_hooks[route]()
+        # Navigation is shown at once, along with anything already pending
+        updates.request()
+        updates.flush()
     
     page.on_route_change = route_change
+    page.on_disconnect = close_session
+    page.on_close = close_session
+    listen("customer", notify_customer)
     page.go(page.route)
 
 if __name__ == "__main__":
-    ft.app(target=main, view=ft.WEB_BROWSER, assets_dir="assets")
\ No newline at end of file
+    ft.app(target=main, view=ft.WEB_BROWSER, assets_dir="assets", upload_dir=UPLOAD_DIR)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import swahili  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Every data file is relative to the working directory, so each test gets
+    # its own, with fresh process-wide singletons
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(swahili.OrderIdAllocator, "_shared", None)
+    monkeypatch.setattr(swahili.OrderStore, "_shared", None)
+    monkeypatch.setattr(swahili.DataManager, "engine", swahili.JournalStorage())
+    return tmp_path
+
+
+@pytest.fixture
+def restart(monkeypatch):
+    # Simulates a process restart: new engine, allocator and store over the same files
+    def restart() -> swahili.OrderStore:
+        monkeypatch.setattr(swahili.OrderIdAllocator, "_shared", None)
+        monkeypatch.setattr(swahili.DataManager, "engine", swahili.JournalStorage())
+        return swahili.OrderStore()
+    return restart
+
+
+@pytest.fixture
+def service() -> swahili.OrderService:
+    return swahili.OrderService(swahili.OrderStore())
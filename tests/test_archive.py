@@ -0,0 +1,61 @@
+import time
+
+from swahili import OrderArchive
+
+
+def place_and_complete(service, count=6):
+    orders = [service.place_order(f"Mteja {i % 2}", "Supu" if i % 2 else "Mihogo") for i in range(count)]
+    for request in orders[:count // 2]:
+        service.toggle_complete(request.order_id)
+    return orders[:count // 2], orders[count // 2:]
+
+
+def test_archive_round_trip(service, restart):
+    completed, active = place_and_complete(service)
+
+    archived = service.store.archive_completed(time.time() + 1)
+
+    assert {r.order_id for r in archived} == {r.order_id for r in completed}
+    store = restart()
+    assert {r.order_id for r in store.all()} == {r.order_id for r in active}
+    assert len(store.archive) == len(completed)
+    for request in completed:
+        assert store.get(request.order_id) is None
+        assert store.find(request.order_id).to_dict() == request.to_dict()
+    assert store.archive.latest_for("mteja 0").order_id in {r.order_id for r in completed}
+    assert {r.order_id for r in OrderArchive().iter_all()} == {r.order_id for r in completed}
+
+
+def test_recent_completed_orders_stay_in_the_working_set(service):
+    place_and_complete(service)
+
+    assert service.archive_completed() == []
+    assert len(service.store.archive) == 0
+
+
+def test_stranded_duplicates_are_dropped_on_load(service, restart):
+    completed, active = place_and_complete(service)
+    stats = service.store.stats.to_summary()
+    # A crash after the archive write but before the journal delete
+    service.store.archive.write(completed)
+
+    store = restart()
+
+    assert {r.order_id for r in store.all()} == {r.order_id for r in active}
+    assert store.stats.to_summary() == stats
+    assert store.archive_completed(time.time() + 1) == []
+    assert len(restart().archive) == len(completed)
+
+
+def test_archive_only_reads_partitions_that_can_hold_the_order(service, monkeypatch):
+    completed, _ = place_and_complete(service)
+    service.store.archive_completed(time.time() + 1)
+    archive = service.store.archive
+    reads = []
+    original = archive._read
+    monkeypatch.setattr(archive, "_read", lambda partition: reads.append(partition) or original(partition))
+
+    assert archive.get("ORD-1") is None
+    assert archive.archived_ids(service.store.all()) == set()
+    assert reads == []
+    assert archive.get(completed[0].order_id) is not None
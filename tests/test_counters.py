@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+
+from swahili import CustomerIndex, MENU_ITEMS, OrderStats, Recommender, SalesAnalytics
+
+DISHES = list(MENU_ITEMS)
+
+
+def nonzero(value):
+    # Incremental counters keep zero entries that a rebuild never creates
+    if isinstance(value, dict):
+        cleaned = {k: nonzero(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (0, [0, 0], {}, Counter())}
+    return value
+
+
+def exercise(service):
+    for i in range(40):
+        service.place_order(f"Mteja {i % 6}", DISHES[i % len(DISHES)], 1 + i % 3)
+    orders = service.store.all()
+    for request in orders[:20]:
+        service.update_status(request.order_id, "Cooking")
+    for request in orders[:8]:
+        service.toggle_complete(request.order_id)
+    for request in orders[30:34]:
+        service.delete(request.order_id)
+    service.store.update_many([r.order_id for r in orders[20:25]], user_name="Mteja Mpya")
+    service.bulk_update_status([r.order_id for r in orders[10:15]], "On the way", from_status="Cooking")
+    service.place_orders([{"user_name": "Mteja 9", "food_type": DISHES[0], "quantity": "2"}])
+
+
+def test_order_stats_match_a_rebuild(service):
+    exercise(service)
+
+    assert nonzero(service.store.stats.to_summary()) == nonzero(OrderStats(service.store.all()).to_summary())
+
+
+def test_customer_index_matches_a_rebuild(service):
+    exercise(service)
+    rebuilt = CustomerIndex(service.store.all())
+
+    for name in ["Mteja 0", "Mteja 3", "Mteja Mpya", "Mteja 9", "Hakuna"]:
+        expected = {r.order_id for r in rebuilt.orders_for(name)}
+        assert {r.order_id for r in service.store.customers.orders_for(name)} == expected
+        assert (name in service.store.customers) == bool(expected)
+
+
+def test_recommender_matches_a_rebuild(service):
+    exercise(service)
+    live = service.store.recommender.to_summary()
+    rebuilt = Recommender(service.store.all()).to_summary()
+
+    for field in ("popularity", "favorites", "by_period"):
+        assert nonzero(live[field]) == nonzero(rebuilt[field])
+
+
+def test_sales_analytics_match_a_rebuild(service):
+    exercise(service)
+    live = service.store.analytics
+    rebuilt = SalesAnalytics(service.store.all(), path="rebuilt.json")
+
+    assert live.totals == rebuilt.totals
+    assert nonzero(live.hourly) == nonzero(rebuilt.hourly)
+    assert nonzero(live.daily) == nonzero(rebuilt.daily)
+    assert nonzero(live.daily_dishes) == nonzero(rebuilt.daily_dishes)
+
+
+def test_archived_orders_still_count(service, restart):
+    exercise(service)
+    before = service.store.stats.snapshot()
+    popularity = nonzero(service.store.recommender.to_summary()["popularity"])
+
+    archived = service.store.archive_completed(time.time() + 1)
+    assert archived and service.store.stats.snapshot() == before
+
+    store = restart()
+    assert store.stats.snapshot() == before
+    assert nonzero(store.recommender.to_summary()["popularity"]) == popularity
+    assert store.analytics.totals == [before["total_orders"], before["total_revenue"]]
@@ -0,0 +1,75 @@
+import pytest
+
+from swahili import KitchenScheduler, prep_seconds
+
+
+@pytest.fixture
+def kitchen(service):
+    return KitchenScheduler(service, stations=1, batch_size=3)
+
+
+def statuses(service):
+    return [(r.food_type, r.delivery_status) for r in service.store.all()]
+
+
+def test_identical_dishes_cook_in_one_batch(service, kitchen):
+    for dish in ["Supu", "Supu", "Mihogo", "Supu", "Supu"]:
+        service.place_order("Asha", dish)
+
+    kitchen.tick(now=1000)
+    assert statuses(service) == [("Supu", "Cooking"), ("Supu", "Cooking"), ("Mihogo", "Preparing"),
+                                 ("Supu", "Cooking"), ("Supu", "Preparing")]
+
+    kitchen.tick(now=1000 + prep_seconds("Supu"))
+    assert statuses(service) == [("Supu", "On the way"), ("Supu", "On the way"), ("Mihogo", "Cooking"),
+                                 ("Supu", "On the way"), ("Supu", "Preparing")]
+
+
+def test_order_sent_back_to_preparing_leaves_its_batch(service, kitchen):
+    first = service.place_order("Asha", "Supu")
+    second = service.place_order("Baraka", "Supu")
+    kitchen.tick(now=1000)
+
+    service.update_status(second.order_id, "Preparing")
+    kitchen.tick(now=1000 + prep_seconds("Supu"))
+
+    assert service.get(first.order_id).delivery_status == "On the way"
+    # Requeued and started again on the free station, not finished with the old batch
+    assert service.get(second.order_id).delivery_status == "Cooking"
+
+
+def test_tick_does_not_overwrite_an_admin_edit(service, kitchen, monkeypatch):
+    first = service.place_order("Asha", "Supu")
+    second = service.place_order("Baraka", "Supu")
+    bulk_update_status = service.bulk_update_status
+
+    def admin_edits_first(order_ids, status, from_status=None):
+        # The admin changes the order between the batch pick and the store write
+        service.update_status(first.order_id, "On the way")
+        return bulk_update_status(order_ids, status, from_status)
+
+    monkeypatch.setattr(service, "bulk_update_status", admin_edits_first)
+    kitchen.tick(now=1000)
+
+    assert service.get(first.order_id).delivery_status == "On the way"
+    assert service.get(second.order_id).delivery_status == "Cooking"
+
+
+def test_expedited_order_starts_first(service, kitchen):
+    waiting = service.place_order("Asha", "Mihogo")
+    urgent = service.place_order("Baraka", "Supu")
+
+    assert kitchen.expedite(urgent.order_id)
+    assert kitchen.is_expedited(urgent.order_id)
+    kitchen.tick(now=1000)
+
+    assert service.get(urgent.order_id).delivery_status == "Cooking"
+    assert service.get(waiting.order_id).delivery_status == "Preparing"
+    assert not kitchen.expedite(urgent.order_id)
+
+
+def test_eta_counts_the_queue_ahead(service, kitchen):
+    first = service.place_order("Asha", "Supu")
+    second = service.place_order("Baraka", "Mihogo")
+
+    assert kitchen.eta_minutes(second.order_id, now=1000) > kitchen.eta_minutes(first.order_id, now=1000)
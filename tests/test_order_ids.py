@@ -0,0 +1,36 @@
+from swahili import FoodRequest, OrderIdAllocator, OrderService
+
+
+def number(order_id: str) -> int:
+    return int(order_id[4:])
+
+
+def test_ids_are_not_reused_after_restart():
+    first = OrderIdAllocator()
+    issued = [first.next_id() for _ in range(3)]
+
+    # A crash loses the unused rest of the block, never an issued ID
+    second = OrderIdAllocator()
+
+    assert number(second.next_id()) > max(number(i) for i in issued)
+
+
+def test_ids_seen_in_storage_are_not_reused(restart):
+    store = restart()
+    store.add(FoodRequest("Asha", "Mihogo", order_id="ORD-50000"))
+
+    service = OrderService(restart())
+
+    assert number(service.place_order("Baraka", "Supu").order_id) > 50000
+
+
+def test_loading_orders_does_not_rewrite_the_sequence_file(restart, monkeypatch):
+    service = OrderService(restart())
+    for i in range(250):
+        service.place_order(f"Mteja {i}", "Supu")
+    writes = []
+    monkeypatch.setattr(OrderIdAllocator, "_reserve", lambda self, until: writes.append(until))
+
+    restart()
+
+    assert writes == []
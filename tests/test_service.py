@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from swahili import MENU_ITEMS, OrderValidationError
+
+
+def test_place_order_prices_and_stores(service):
+    request = service.place_order("Asha", "Supu", "2")
+
+    assert request.quantity == 2
+    assert request.price == 2 * MENU_ITEMS["Supu"]["price"]
+    assert service.get(request.order_id) is request
+
+
+@pytest.mark.parametrize("quantity", [0, "0", -1, 2.5, "2.5", "", True, None, "mbili"])
+def test_place_order_rejects_bad_quantities(service, quantity):
+    with pytest.raises(OrderValidationError):
+        service.place_order("Asha", "Supu", quantity)
+
+
+def test_place_orders_reports_bad_rows_and_stores_the_rest(service, monkeypatch):
+    writes = []
+    add_many = service.store.add_many
+    monkeypatch.setattr(service.store, "add_many", lambda orders: writes.append(len(orders)) or add_many(orders))
+
+    placed, errors = service.place_orders([
+        {"user_name": "Asha", "food_type": "Supu", "quantity": 2},
+        {"user_name": "", "food_type": "Supu"},
+        {"user_name": "Baraka", "food_type": "Pizza"},
+        {"user_name": "Chausiku", "food_type": "Supu", "quantity": 0},
+        {"user_name": "Daudi", "food_type": "Supu", "quantity": 2.0},
+        {"user_name": "Eliya", "food_type": "Supu", "quantity": 2.7},
+        ["not", "a", "row"],
+        {"user_name": 7, "food_type": "Supu"},
+        {"user_name": "Fatuma", "food_type": "Mihogo"},
+    ])
+
+    assert [(r.user_name, r.quantity) for r in placed] == [("Asha", 2), ("Daudi", 2), ("Fatuma", 1)]
+    assert [number for number, _ in errors] == [2, 3, 4, 6, 7, 8]
+    assert writes == [3]
+    assert len(service.store) == 3
+
+
+def test_import_orders_from_json_lines(service):
+    with open("orders.jsonl", "w") as f:
+        f.write(json.dumps({"user_name": "Asha", "food_type": "Supu"}) + "\n")
+        f.write("{not json\n")
+        f.write(json.dumps({"user_name": "Baraka", "food_type": "Supu", "quantity": 0}) + "\n")
+
+    placed, errors = service.import_orders("orders.jsonl")
+
+    assert [(r.user_name, r.quantity) for r in placed] == [("Asha", 1)]
+    assert [number for number, _ in errors] == [2, 3]
+
+
+def test_import_orders_from_csv(service):
+    with open("orders.csv", "w", newline="") as f:
+        f.write("user_name,food_type,quantity,special_requests\n")
+        f.write("Asha,Supu,,bila pilipili\n")
+        f.write("Baraka,Supu,0,\n")
+
+    placed, errors = service.import_orders("orders.csv")
+
+    assert [(r.user_name, r.quantity, r.special_requests) for r in placed] == [("Asha", 1, "bila pilipili")]
+    assert [number for number, _ in errors] == [2]
+
+
+def test_bulk_update_skips_orders_that_left_the_expected_status(service):
+    cooking = service.place_order("Asha", "Supu")
+    waiting = service.place_order("Baraka", "Supu")
+    service.update_status(cooking.order_id, "Cooking")
+
+    updated = service.advance_all("Cooking", "On the way")
+
+    assert [r.order_id for r in updated] == [cooking.order_id]
+    assert service.get(waiting.order_id).delivery_status == "Preparing"
+    assert service.bulk_update_status([waiting.order_id], "Delivered", from_status="Cooking") == []
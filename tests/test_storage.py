@@ -0,0 +1,103 @@
+import glob
+import io
+import json
+
+import pytest
+
+from swahili import FoodRequest, JournalStorage, SQLiteStorage, iter_json_array
+
+
+def make_order(name="Asha", dish="Mihogo"):
+    return FoodRequest(name, dish)
+
+
+def test_journal_replays_over_snapshot_and_compacts():
+    engine = JournalStorage()
+    kept, changed, deleted = make_order(), make_order("Baraka"), make_order("Chausiku")
+    engine.save_all([kept, changed, deleted])
+    changed.delivery_status = "Cooking"
+    engine.update(changed)
+    engine.delete(deleted.order_id)
+    added = make_order("Daudi", "Supu")
+    engine.create(added)
+
+    loaded = {r.order_id: r for r in JournalStorage().load_all()}
+
+    assert list(loaded) == [kept.order_id, changed.order_id, added.order_id]
+    assert loaded[changed.order_id].delivery_status == "Cooking"
+    # Startup folds the journal into the snapshot
+    assert open("food_requests.journal").read() == ""
+    with open("food_requests.json") as f:
+        assert [item["order_id"] for item in json.load(f)] == list(loaded)
+
+
+def test_torn_journal_line_is_skipped():
+    engine = JournalStorage()
+    order = make_order()
+    engine.create(order)
+    with open("food_requests.journal", "a") as f:
+        f.write('{"op": "create", "order": {"user_na')
+
+    assert [r.order_id for r in JournalStorage().load_all()] == [order.order_id]
+
+
+def test_damaged_snapshot_keeps_journal_only_orders():
+    engine = JournalStorage()
+    engine.save_all([make_order("Asha"), make_order("Baraka")])
+    journal_only = make_order("Chausiku", "Supu")
+    engine.create(journal_only)
+    with open("food_requests.json") as f:
+        text = f.read()
+    with open("food_requests.json", "w") as f:
+        f.write(text[:len(text) * 3 // 4])
+
+    loaded = [r.order_id for r in JournalStorage().load_all()]
+
+    assert journal_only.order_id in loaded
+    assert glob.glob("food_requests.json.corrupt-*")
+    # The compaction after the repair persisted it
+    assert journal_only.order_id in [r.order_id for r in JournalStorage().load_all()]
+
+
+def test_duplicate_legacy_ids_are_renumbered():
+    first, second = make_order("Asha"), make_order("Baraka")
+    second.order_id = first.order_id
+    JournalStorage().save_all([first])
+    with open("food_requests.json", "w") as f:
+        json.dump([first.to_dict(), second.to_dict()], f)
+
+    loaded = JournalStorage().load_all()
+
+    assert len({r.order_id for r in loaded}) == 2
+    assert [r.user_name for r in loaded] == ["Asha", "Baraka"]
+
+
+@pytest.mark.parametrize("text", [
+    "[]",
+    "[ ]",
+    "[12345, 678]",
+    '[{"a": [1, 2]}, "x\\"y", true, null, -1.5e3]',
+    "[\n1.25E-2\n,\n{}\n]",
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64])
+def test_iter_json_array_across_chunk_boundaries(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+def test_iter_json_array_rejects_truncated_input():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO('[1, {"a"'), 2))
+
+
+def test_sqlite_round_trip_keeps_status_history():
+    engine = SQLiteStorage("orders.db")
+    order = make_order()
+    order.delivery_status = "Cooking"
+    order.record_status(1000)
+    engine.create(order)
+
+    for loaded in (engine.get(order.order_id), next(engine.iter_all()), engine.load_all()[0]):
+        assert loaded.status_history == [["Cooking", 1000]]
+        assert loaded.status_entered_at() == 1000
+    assert [r.order_id for r in engine.list_by_status("Cooking")] == [order.order_id]
+    assert [r.order_id for r in engine.list_by_user("asha")] == [order.order_id]